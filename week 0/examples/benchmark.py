@@ -0,0 +1,208 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from generate import METHODS, parse_size, write_maze
+from maze import Maze, SOLVERS
+
+# Path of the degrees project, whose breadth-first search is benchmarked
+# on the same mazes
+DEGREES_UTIL = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "..", "projects", "degrees", "util.py")
+
+# Solvers too slow for big mazes and the most cells they are run on
+CELL_LIMITS = {
+    "iddfs": 10 ** 4
+}
+
+DEFAULT_SIZES = [(51, 51), (301, 301)]
+
+
+def degrees_util():
+    """Imports the degrees project's util module under its own name."""
+    if "degrees_util" not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            "degrees_util", DEGREES_UTIL)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules["degrees_util"] = module
+    return sys.modules["degrees_util"]
+
+
+def solve_degrees_bfs(m):
+    """
+    Solves a maze with the breadth-first search loop of degrees.py:
+    its QueueFrontier, an explored set and a goal test when a node
+    is generated rather than when it is expanded.
+    """
+    util = degrees_util()
+    m.num_explored = 0
+    m.max_frontier = 0
+    m.explored = set()
+    m.solution = None
+
+    started = time.perf_counter()
+    try:
+        frontier = util.QueueFrontier()
+        frontier.add(util.Node(state=m.start, parent=None, action=None))
+        while not frontier.empty():
+            m.max_frontier = max(m.max_frontier, len(frontier.frontier))
+            node = frontier.remove()
+            m.num_explored += 1
+            m.explored.add(node.state)
+            for action, state in m.neighbors(node.state):
+                if not frontier.contains_state(state) and state not in m.explored:
+                    child = util.Node(state=state, parent=node, action=action)
+                    if state == m.goal:
+                        m.solution = m.backtrack(child)
+                        return
+                    frontier.add(child)
+        raise Exception("no solution")
+    finally:
+        m.solve_time = time.perf_counter() - started
+
+
+def solve(m, solver):
+    """Solves a maze with a Maze algorithm or with degrees-bfs."""
+    if solver == "degrees-bfs":
+        solve_degrees_bfs(m)
+    else:
+        m.solve(solver)
+
+
+def run_solver(filename, solver, memory=True):
+    """
+    Returns the cost of solving a maze file with solver as a dict.
+    With memory, the maze is solved a second time under tracemalloc
+    to record the peak bytes the search allocated, so that tracing
+    does not slow down the timed run.
+    """
+    m = Maze(filename)
+    solve(m, solver)
+    result = {
+        "solver": solver,
+        "explored": m.num_explored,
+        "max_frontier": m.max_frontier,
+        "length": len(m.solution[0]),
+        "seconds": round(m.solve_time, 6)
+    }
+    if memory:
+        m = Maze(filename)
+        tracemalloc.start()
+        try:
+            solve(m, solver)
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def benchmark_case(method, height, width, seed, solvers, memory=True):
+    """Generates one maze and runs every solver on it."""
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "maze.txt")
+        started = time.perf_counter()
+        write_maze(filename, height, width, method, seed)
+        case = {
+            "method": method,
+            "height": height,
+            "width": width,
+            "seed": seed,
+            "cells": height * width,
+            "generate_seconds": round(time.perf_counter() - started, 6),
+            "results": []
+        }
+        for solver in solvers:
+            limit = CELL_LIMITS.get(solver)
+            if limit is not None and height * width > limit:
+                case["results"].append({
+                    "solver": solver,
+                    "skipped": f"more than {limit} cells"
+                })
+                continue
+            case["results"].append(run_solver(filename, solver, memory))
+    return case
+
+
+def print_case(case, baseline=None):
+    """Prints a case as a table, with time ratios against a baseline case."""
+    print(f"{case['method']} {case['height']}x{case['width']} "
+          f"seed {case['seed']}")
+    previous = {}
+    if baseline is not None:
+        previous = {result["solver"]: result for result in baseline["results"]}
+    for result in case["results"]:
+        solver = result["solver"]
+        if "skipped" in result:
+            print(f"  {solver:<12}skipped, {result['skipped']}")
+            continue
+        line = (f"  {solver:<12}{result['explored']:>10}"
+                f"{result['max_frontier']:>10}{result['length']:>8}"
+                f"{result['seconds']:>10.4f}")
+        if "peak_bytes" in result:
+            line += f"{result['peak_bytes'] / 2 ** 20:>9.1f}MB"
+        old = previous.get(solver)
+        if old is not None and "seconds" in old:
+            line += f"  x{result['seconds'] / max(old['seconds'], 1e-9):.2f}"
+            if old["explored"] != result["explored"]:
+                line += f" (explored was {old['explored']})"
+        print(line)
+
+
+def case_key(case):
+    return (case["method"], case["height"], case["width"], case["seed"])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark maze solvers on generated mazes.")
+    parser.add_argument("--sizes", type=parse_size, nargs="+",
+                        default=DEFAULT_SIZES,
+                        help="HEIGHTxWIDTH maze sizes")
+    parser.add_argument("--methods", choices=list(METHODS), nargs="+",
+                        default=list(METHODS))
+    parser.add_argument("--solvers", nargs="+",
+                        choices=list(SOLVERS) + ["degrees-bfs"],
+                        default=list(SOLVERS) + ["degrees-bfs"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc run of each solver")
+    parser.add_argument("--output", default="benchmark.json",
+                        help="JSON file to write the results to")
+    parser.add_argument("--baseline",
+                        help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {case_key(case): case for case in json.load(f)["cases"]}
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": []
+    }
+    print(f"  {'solver':<12}{'explored':>10}{'frontier':>10}"
+          f"{'length':>8}{'seconds':>10}"
+          + ("" if args.no_memory else f"{'peak':>11}"))
+    for height, width in args.sizes:
+        for method in args.methods:
+            case = benchmark_case(method, height, width, args.seed,
+                                  args.solvers, not args.no_memory)
+            print_case(case, baseline.get(case_key(case)))
+            report["cases"].append(case)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
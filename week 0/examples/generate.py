@@ -0,0 +1,207 @@
+import argparse
+import random
+
+# Values of a cell in a generated grid
+WALL = 1
+OPEN = 0
+
+
+def generate(height, width, method="backtracker", seed=None, room_size=8):
+    """
+    Returns a random maze as text, in the format Maze reads, with the
+    start in the top left corner and the goal in the bottom right.
+
+    The same method, size and seed always give the same maze.
+    """
+    if height < 3 or width < 3:
+        raise Exception("maze must be at least 3x3")
+    if method not in METHODS:
+        raise Exception(f"unknown method {method}")
+
+    # Start and goal are the first and last cells a passage can reach
+    start = width + 1
+    goal = last_odd(height - 2) * width + last_odd(width - 2)
+    if goal == start:
+        raise Exception("maze is too small for a start and a goal")
+
+    rng = random.Random(seed)
+    if method == "rooms":
+        cells = carve_rooms(height, width, rng, room_size)
+    else:
+        cells = METHODS[method](height, width, rng)
+    return maze_text(cells, width, start, goal)
+
+
+def write_maze(filename, height, width, method="backtracker", seed=None,
+               room_size=8):
+    """Writes a generated maze to filename."""
+    with open(filename, "w") as f:
+        f.write(generate(height, width, method, seed, room_size))
+
+
+def last_odd(n):
+    """Returns the largest odd number not above n."""
+    return n if n % 2 else n - 1
+
+
+def walled(height, width):
+    """Returns a grid of one byte per cell, all walls."""
+    return bytearray([WALL]) * (height * width)
+
+
+def steps(cell, height, width):
+    """
+    Returns the offsets from a passage cell (odd row and column)
+    to the passage cells two steps away that stay inside the border.
+    """
+    row, col = divmod(cell, width)
+    offsets = []
+    if row > 1:
+        offsets.append(-2 * width)
+    if row + 2 < height - 1:
+        offsets.append(2 * width)
+    if col > 1:
+        offsets.append(-2)
+    if col + 2 < width - 1:
+        offsets.append(2)
+    return offsets
+
+
+def carve_backtracker(height, width, rng):
+    """
+    Randomized depth-first search (recursive backtracker): long
+    winding corridors with few branches and exactly one path
+    between any two cells.
+    """
+    cells = walled(height, width)
+    start = width + 1
+    cells[start] = OPEN
+
+    # Explicit stack, recursion would overflow on large mazes
+    stack = [start]
+    while stack:
+        cell = stack[-1]
+        options = [offset for offset in steps(cell, height, width)
+                   if cells[cell + offset] == WALL]
+        if not options:
+            stack.pop()
+            continue
+        offset = rng.choice(options)
+        cells[cell + offset // 2] = OPEN
+        cells[cell + offset] = OPEN
+        stack.append(cell + offset)
+    return cells
+
+
+def carve_prim(height, width, rng):
+    """
+    Randomized Prim's algorithm: short dead ends branching off
+    everywhere and exactly one path between any two cells.
+    """
+    cells = walled(height, width)
+    start = width + 1
+    cells[start] = OPEN
+
+    # Cells next to the carved part, each in the list at most once
+    listed = bytearray(height * width)
+    frontier = []
+
+    def add_neighbors(cell):
+        for offset in steps(cell, height, width):
+            neighbor = cell + offset
+            if cells[neighbor] == WALL and not listed[neighbor]:
+                listed[neighbor] = 1
+                frontier.append(neighbor)
+
+    add_neighbors(start)
+    while frontier:
+        # Remove a random frontier cell by swapping it with the last one
+        index = rng.randrange(len(frontier))
+        frontier[index], frontier[-1] = frontier[-1], frontier[index]
+        cell = frontier.pop()
+
+        # Connect it to a random carved neighbor
+        offset = rng.choice([offset for offset in steps(cell, height, width)
+                             if cells[cell + offset] == OPEN])
+        cells[cell + offset // 2] = OPEN
+        cells[cell] = OPEN
+        add_neighbors(cell)
+    return cells
+
+
+def carve_rooms(height, width, rng, room_size=8):
+    """
+    Open rooms of room_size cells in a grid, with one random door in
+    each wall between neighboring rooms. Rooms are wide open and
+    there are many paths between any two cells.
+    """
+    if room_size < 2:
+        raise Exception("rooms must be at least 2 cells wide")
+    cells = bytearray(height * width)
+
+    # Border, then inner walls that leave a room before the border
+    rows = [0] + list(range(room_size, height - 2, room_size)) + [height - 1]
+    cols = [0] + list(range(room_size, width - 2, room_size)) + [width - 1]
+    for i in rows:
+        cells[i * width:(i + 1) * width] = bytes([WALL]) * width
+    for j in cols:
+        cells[j::width] = bytes([WALL]) * height
+
+    # A door in every wall segment between two rooms
+    for i in rows[1:-1]:
+        for left, right in zip(cols, cols[1:]):
+            cells[i * width + rng.randrange(left + 1, right)] = OPEN
+    for j in cols[1:-1]:
+        for top, bottom in zip(rows, rows[1:]):
+            cells[rng.randrange(top + 1, bottom) * width + j] = OPEN
+    return cells
+
+
+def maze_text(cells, width, start, goal):
+    """Returns a grid of wall bytes as maze text with A and B marked."""
+    text = cells.translate(TEXT_BYTES)
+    text[start] = ord("A")
+    text[goal] = ord("B")
+    return "".join(text[i:i + width].decode("ascii") + "\n"
+                   for i in range(0, len(text), width))
+
+
+# Maps wall bytes to maze characters
+TEXT_BYTES = bytes.maketrans(bytes([OPEN, WALL]), b" #")
+
+# Generation methods and the functions carving them
+METHODS = {
+    "backtracker": carve_backtracker,
+    "prim": carve_prim,
+    "rooms": carve_rooms
+}
+
+
+def parse_size(size):
+    """Parses a HEIGHTxWIDTH size such as 101x201."""
+    try:
+        height, width = size.lower().split("x")
+        return int(height), int(width)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size {size}, use HxW")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a random maze.")
+    parser.add_argument("output", help="maze text file to write")
+    parser.add_argument("--size", type=parse_size, default=(21, 41),
+                        help="HEIGHTxWIDTH in cells, walls included")
+    parser.add_argument("--method", choices=list(METHODS),
+                        default="backtracker")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--room-size", type=int, default=8,
+                        help="room width for the rooms method")
+    args = parser.parse_args()
+
+    height, width = args.size
+    write_maze(args.output, height, width, args.method, args.seed,
+               args.room_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,18 @@
-import sys
+import argparse
+import heapq
+import itertools
+import re
+import time
+from array import array
+from collections import Counter, deque
+
+# Moves as (action, row change, column change, bit in Maze.moves)
+MOVES = [
+    ("up", -1, 0, 1),
+    ("down", 1, 0, 2),
+    ("left", 0, -1, 4),
+    ("right", 0, 1, 8)
+]
 
 class Node():
     def __init__(self, state, parent, action):
@@ -9,13 +23,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Counts of states currently in the frontier for O(1) lookups
+        self.states = Counter()
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] += 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -24,10 +41,15 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard_state(node.state)
             return node
 
+    def discard_state(self, state):
+        self.states[state] -= 1
+        if self.states[state] == 0:
+            del self.states[state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -35,10 +57,37 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard_state(node.state)
             return node
 
+
+class PriorityFrontier(StackFrontier):
+    """
+    Frontier that removes the node with the lowest key(node) first,
+    oldest first among equal keys.
+    """
+
+    def __init__(self, key):
+        super().__init__()
+        self.frontier = []
+        self.key = key
+        self.counter = itertools.count()
+
+    def add(self, node):
+        heapq.heappush(self.frontier,
+                       (self.key(node), next(self.counter), node))
+        self.states[node.state] += 1
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = heapq.heappop(self.frontier)[2]
+            self.discard_state(node.state)
+            return node
+
+
 class Maze():
 
     def __init__(self, filename):
@@ -58,35 +107,76 @@ class Maze():
         self.height = len(contents)
         self.width = max(len(line) for line in contents)
 
-        # Keep track of walls
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
-
+        # Keep track of walls as one byte per cell (1 for a wall),
+        # cell (i, j) has the flat state id i * width + j
+        self.cells = bytearray()
+        for i, line in enumerate(contents):
+            if "A" in line:
+                self.start = (i, line.index("A"))
+            if "B" in line:
+                self.goal = (i, line.index("B"))
+            # Anything but A, B and spaces is a wall, missing cells are open
+            line = re.sub("[^ AB]", "#", line.ljust(self.width))
+            self.cells += line.encode("ascii").translate(WALL_BYTES)
+
+        self.moves = self.build_moves()
         self.solution = None
 
+    @property
+    def walls(self):
+        """Walls as a list of rows of booleans."""
+        return [
+            [bool(wall) for wall in self.cells[i * self.width:(i + 1) * self.width]]
+            for i in range(self.height)
+        ]
+
+    def build_moves(self):
+        """
+        Precomputes a neighbor table: one byte per cell with a bit set
+        (see MOVES) for each direction leading to an open cell.
+        Uses NumPy when it is installed.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+
+        height, width = self.height, self.width
+        if np is not None:
+            open_cells = np.frombuffer(bytes(self.cells), dtype=np.uint8) \
+                .reshape(height, width) == 0
+            moves = np.zeros((height, width), dtype=np.uint8)
+            moves[1:, :] |= np.where(open_cells[:-1, :], 1, 0).astype(np.uint8)
+            moves[:-1, :] |= np.where(open_cells[1:, :], 2, 0).astype(np.uint8)
+            moves[:, 1:] |= np.where(open_cells[:, :-1], 4, 0).astype(np.uint8)
+            moves[:, :-1] |= np.where(open_cells[:, 1:], 8, 0).astype(np.uint8)
+            moves[~open_cells] = 0
+            return bytearray(moves.tobytes())
+
+        cells = self.cells
+        moves = bytearray(height * width)
+        for cell in range(height * width):
+            if cells[cell]:
+                continue
+            row, col = divmod(cell, width)
+            mask = 0
+            if row > 0 and not cells[cell - width]:
+                mask |= 1
+            if row < height - 1 and not cells[cell + width]:
+                mask |= 2
+            if col > 0 and not cells[cell - 1]:
+                mask |= 4
+            if col < width - 1 and not cells[cell + 1]:
+                mask |= 8
+            moves[cell] = mask
+        return moves
 
     def print(self):
         solution = self.solution[1] if self.solution is not None else None
         print()
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
+        for i in range(self.height):
+            for j in range(self.width):
+                if self.cells[i * self.width + j]:
                     print("█", end="")
                 elif (i, j) == self.start:
                     print("A", end="")
@@ -102,33 +192,38 @@ class Maze():
 
     def neighbors(self, state):
         row, col = state
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1))
+        mask = self.moves[row * self.width + col]
+        return [
+            (action, (row + dr, col + dc))
+            for action, dr, dc, bit in MOVES if mask & bit
         ]
 
-        result = []
-        for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
-                result.append((action, (r, c)))
-        return result
 
-
-    def solve(self):
+    def solve(self, algorithm="dfs"):
         """Finds a solution to maze, if one exists."""
 
-        # Keep track of number of states explored
+        # Keep track of number of states explored, time taken
+        # and the largest the frontier got
         self.num_explored = 0
+        self.max_frontier = 0
+        self.explored = set()
+        self.solution = None
 
-        # Initialize frontier to just the starting position
-        start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
-        frontier.add(start)
+        start = time.perf_counter()
+        try:
+            getattr(self, SOLVERS[algorithm])()
+        finally:
+            self.solve_time = time.perf_counter() - start
 
-        # Initialize an empty explored set
-        self.explored = set()
+    def manhattan(self, state):
+        """Returns Manhattan distance from state to the goal."""
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
+    def solve_frontier(self, frontier):
+        """Searches the maze expanding nodes in the order frontier gives."""
+
+        # Initialize frontier to just the starting position
+        frontier.add(Node(state=self.start, parent=None, action=None))
 
         # Keep looping until solution found
         while True:
@@ -136,6 +231,7 @@ class Maze():
             # If nothing left in frontier, then no path
             if frontier.empty():
                 raise Exception("no solution")
+            self.max_frontier = max(self.max_frontier, len(frontier.frontier))
 
             # Choose a node from the frontier
             node = frontier.remove()
@@ -143,15 +239,7 @@ class Maze():
 
             # If node is the goal, then we have a solution
             if node.state == self.goal:
-                actions = []
-                cells = []
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                self.solution = (actions, cells)
+                self.solution = self.backtrack(node)
                 return
 
             # Mark node as explored
@@ -163,11 +251,261 @@ class Maze():
                     child = Node(state=state, parent=node, action=action)
                     frontier.add(child)
 
+    def solve_dfs(self):
+        """Depth-first search."""
+        self.solve_frontier(StackFrontier())
+
+    def solve_bfs(self):
+        """Breadth-first search, finds a shortest path."""
+        self.solve_frontier(QueueFrontier())
+
+    def solve_greedy(self):
+        """Greedy best-first search on Manhattan distance to the goal."""
+        self.solve_frontier(PriorityFrontier(
+            key=lambda node: self.manhattan(node.state)))
+
+    def solve_astar(self):
+        """A* search with the Manhattan distance, finds a shortest path."""
 
-    def output_image(self, filename, show_solution=True, show_explored=False):
+        # Frontier is a binary heap of (f, -g, tie breaker, node), a node
+        # is only expanded the first time its state comes off the heap
+        counter = itertools.count()
+        start = Node(state=self.start, parent=None, action=None)
+        frontier = [(self.manhattan(self.start), 0, next(counter), start)]
+        cost = {self.start: 0}
+
+        while frontier:
+            self.max_frontier = max(self.max_frontier, len(frontier))
+            _, negative_steps, _, node = heapq.heappop(frontier)
+            if node.state in self.explored:
+                continue
+            self.num_explored += 1
+
+            if node.state == self.goal:
+                self.solution = self.backtrack(node)
+                return
+            self.explored.add(node.state)
+
+            steps = 1 - negative_steps
+            for action, state in self.neighbors(node.state):
+                if state in self.explored or cost.get(state, steps + 1) <= steps:
+                    continue
+                cost[state] = steps
+                child = Node(state=state, parent=node, action=action)
+                # Among equal estimates prefer nodes closer to the goal
+                heapq.heappush(frontier, (steps + self.manhattan(state),
+                                          -steps, next(counter), child))
+        raise Exception("no solution")
+
+    def solve_iddfs(self):
+        """
+        Iterative deepening depth-first search, finds a shortest path.
+        Each round is a depth-limited DFS that revisits a state only
+        if it is reached at a smaller depth than before.
+        """
+        limit = 0
+        while True:
+            depths = {self.start: 0}
+            stack = [Node(state=self.start, parent=None, action=None)]
+            cut_off = False
+            while stack:
+                self.max_frontier = max(self.max_frontier, len(stack))
+                node = stack.pop()
+                depth = depths[node.state]
+                self.num_explored += 1
+                self.explored.add(node.state)
+
+                if node.state == self.goal:
+                    self.solution = self.backtrack(node)
+                    return
+                if depth == limit:
+                    cut_off = True
+                    continue
+
+                for action, state in self.neighbors(node.state):
+                    if depths.get(state, depth + 2) > depth + 1:
+                        depths[state] = depth + 1
+                        stack.append(Node(state=state, parent=node, action=action))
+
+            # Nothing was cut off, so a deeper search finds nothing new
+            if not cut_off:
+                raise Exception("no solution")
+            limit += 1
+
+    def solve_grid(self, heuristic):
+        """
+        Searches flat cell ids with the precomputed neighbor table,
+        without Node objects or tuples. With heuristic this is A* on
+        Manhattan distance, otherwise breadth-first search.
+        Both find a shortest path.
+        """
+        width = self.width
+        moves = self.moves
+        start = self.start[0] * width + self.start[1]
+        goal = self.goal[0] * width + self.goal[1]
+        goal_row, goal_col = self.goal
+        offsets = [(bit, dr * width + dc, code)
+                   for code, (_, dr, dc, bit) in enumerate(MOVES, 1)]
+
+        # Per cell, code of the move that reached it (0 if unreached)
+        # and whether it has been expanded
+        came_by = bytearray(len(self.cells))
+        expanded = bytearray(len(self.cells))
+        came_by[start] = len(MOVES) + 1
+
+        if heuristic:
+            steps = array("l", [0]) * len(self.cells)
+            frontier = [(0, start)]
+        else:
+            frontier = deque([start])
+
+        while frontier:
+            self.max_frontier = max(self.max_frontier, len(frontier))
+            if heuristic:
+                _, cell = heapq.heappop(frontier)
+                if expanded[cell]:
+                    continue
+            else:
+                cell = frontier.popleft()
+            self.num_explored += 1
+            expanded[cell] = 1
+            if cell == goal:
+                self.explored = ExploredCells(expanded, width)
+                self.solution = self.backtrack_grid(came_by, goal)
+                return
+
+            mask = moves[cell]
+            for bit, offset, code in offsets:
+                if not mask & bit:
+                    continue
+                neighbor = cell + offset
+                if heuristic:
+                    cost = steps[cell] + 1
+                    if expanded[neighbor] or (came_by[neighbor]
+                                              and steps[neighbor] <= cost):
+                        continue
+                    steps[neighbor] = cost
+                    came_by[neighbor] = code
+                    row, col = divmod(neighbor, width)
+                    heapq.heappush(frontier, (
+                        cost + abs(row - goal_row) + abs(col - goal_col),
+                        neighbor))
+                elif not came_by[neighbor]:
+                    came_by[neighbor] = code
+                    frontier.append(neighbor)
+
+        self.explored = ExploredCells(expanded, width)
+        raise Exception("no solution")
+
+    def solve_grid_bfs(self):
+        """Breadth-first search on the flat grid."""
+        self.solve_grid(heuristic=False)
+
+    def solve_grid_astar(self):
+        """A* search on the flat grid."""
+        self.solve_grid(heuristic=True)
+
+    def backtrack_grid(self, came_by, cell):
+        """Returns (actions, cells) leading from the start to a flat cell."""
+        actions = []
+        cells = []
+        while came_by[cell] != len(MOVES) + 1:
+            action, dr, dc, _ = MOVES[came_by[cell] - 1]
+            actions.append(action)
+            cells.append(divmod(cell, self.width))
+            cell -= dr * self.width + dc
+        actions.reverse()
+        cells.reverse()
+        return (actions, cells)
+
+    def backtrack(self, node):
+        """Returns (actions, cells) leading from the start to node."""
+        actions = []
+        cells = []
+        while node.parent is not None:
+            actions.append(node.action)
+            cells.append(node.state)
+            node = node.parent
+        actions.reverse()
+        cells.reverse()
+        return (actions, cells)
+
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, cell_border=2):
+        from PIL import Image
+
+        try:
+            import numpy as np
+        except ImportError:
+            img = self.draw_image(cell_size, cell_border,
+                                  show_solution, show_explored)
+        else:
+            img = Image.fromarray(self.render_frame(
+                np, cell_size, cell_border, show_solution, show_explored),
+                "RGBA")
+        img.save(filename)
+
+    def cell_colors(self, show_solution, show_explored):
+        """
+        Yields (cell, color) for every non-empty cell, later ones
+        taking precedence: explored, solution, goal, start, walls.
+        """
+        if self.solution is not None and show_explored:
+            for cell in self.explored:
+                yield cell, EXPLORED_COLOR
+        if self.solution is not None and show_solution:
+            for cell in self.solution[1]:
+                yield cell, SOLUTION_COLOR
+        yield self.goal, GOAL_COLOR
+        yield self.start, START_COLOR
+
+    def render_frame(self, np, cell_size, cell_border,
+                     show_solution, show_explored):
+        """
+        Builds the whole RGBA image as a NumPy array in one pass:
+        a color per cell, scaled up by repeating it, then the borders
+        between cells blacked out.
+        """
+        height, width = self.height, self.width
+        colors = np.empty((height, width, 4), dtype=np.uint8)
+        colors[:, :] = EMPTY_COLOR + (255,)
+
+        if (self.solution is not None and show_explored
+                and isinstance(self.explored, ExploredCells)):
+            explored = np.frombuffer(bytes(self.explored.flags), dtype=np.uint8)
+            colors[explored.reshape(height, width) != 0] = EXPLORED_COLOR + (255,)
+            show_explored = False
+        for (i, j), color in self.cell_colors(show_solution, show_explored):
+            colors[i, j] = color + (255,)
+        walls = np.frombuffer(bytes(self.cells), dtype=np.uint8)
+        colors[walls.reshape(height, width) != 0] = WALL_COLOR + (255,)
+
+        # Work on whole RGBA pixels as 32-bit integers. A cell's rectangle
+        # covers pixels cell_border to cell_size - cell_border inclusive,
+        # the rest of the cell is black border
+        pixels = colors.view(np.uint32)[:, :, 0]
+        black = np.array([0, 0, 0, 255], dtype=np.uint8).view(np.uint32)[0]
+        end = cell_size - cell_border + 1
+
+        # One pixel row per maze row, each cell repeated with its borders
+        strip = np.empty((height, width, cell_size), dtype=np.uint32)
+        strip[:] = pixels[:, :, None]
+        strip[:, :, :cell_border] = black
+        strip[:, :, end:] = black
+
+        # Repeat each strip down the cell, leaving the border rows black
+        frame = np.empty((height, cell_size, width * cell_size),
+                         dtype=np.uint32)
+        frame[:, cell_border:end] = strip.reshape(height, 1, -1)
+        frame[:, :cell_border] = black
+        frame[:, end:] = black
+        return frame.view(np.uint8).reshape(
+            height * cell_size, width * cell_size, 4)
+
+    def draw_image(self, cell_size, cell_border, show_solution, show_explored):
+        """Draws the image one rectangle per cell, without NumPy."""
         from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
 
         # Create a blank canvas
         img = Image.new(
@@ -177,33 +515,15 @@ class Maze():
         )
         draw = ImageDraw.Draw(img)
 
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
-
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
-
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
-
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
-
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
-
-                # Empty cell
+        fills = {}
+        for cell, color in self.cell_colors(show_solution, show_explored):
+            fills[cell] = color
+        for i in range(self.height):
+            for j in range(self.width):
+                if self.cells[i * self.width + j]:
+                    fill = WALL_COLOR
                 else:
-                    fill = (237, 240, 252)
+                    fill = fills.get((i, j), EMPTY_COLOR)
 
                 # Draw cell
                 draw.rectangle(
@@ -211,19 +531,89 @@ class Maze():
                       ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
                     fill=fill
                 )
-
-        img.save(filename)
-
-
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+        return img
+
+
+class ExploredCells():
+    """
+    Set-like view of the explored flag bytes of a grid search,
+    answering (i, j) in explored without a set of tuples.
+    """
+
+    def __init__(self, flags, width):
+        self.flags = flags
+        self.width = width
+
+    def __contains__(self, state):
+        return bool(self.flags[state[0] * self.width + state[1]])
+
+    def __len__(self):
+        return len(self.flags) - self.flags.count(0)
+
+    def __iter__(self):
+        for cell, flag in enumerate(self.flags):
+            if flag:
+                yield divmod(cell, self.width)
+
+
+# Colors of output_image cells
+WALL_COLOR = (40, 40, 40)
+START_COLOR = (255, 0, 0)
+GOAL_COLOR = (0, 171, 28)
+SOLUTION_COLOR = (220, 235, 113)
+EXPLORED_COLOR = (212, 97, 85)
+EMPTY_COLOR = (237, 240, 252)
+
+# Maps maze characters (after anything else became "#") to wall bytes
+WALL_BYTES = bytes.maketrans(b" AB#", b"\x00\x00\x00\x01")
+
+# Maze.solve algorithms and the methods implementing them
+SOLVERS = {
+    "dfs": "solve_dfs",
+    "bfs": "solve_bfs",
+    "greedy": "solve_greedy",
+    "astar": "solve_astar",
+    "iddfs": "solve_iddfs",
+    "grid-bfs": "solve_grid_bfs",
+    "grid-astar": "solve_grid_astar"
+}
+
+
+def compare(filename):
+    """Solves a maze with every algorithm and prints what each cost."""
+    print(f"{'algorithm':<10}{'explored':>10}{'frontier':>10}"
+          f"{'length':>8}{'seconds':>10}")
+    for algorithm in SOLVERS:
+        m = Maze(filename)
+        m.solve(algorithm)
+        print(f"{algorithm:<10}{m.num_explored:>10}{m.max_frontier:>10}"
+              f"{len(m.solution[0]):>8}{m.solve_time:>10.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a maze.")
+    parser.add_argument("maze", help="maze text file")
+    parser.add_argument("--algorithm", choices=list(SOLVERS), default="dfs")
+    parser.add_argument("--compare", action="store_true",
+                        help="run every algorithm and compare their cost")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.maze)
+        return
+
+    m = Maze(args.maze)
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(args.algorithm)
+    print("States Explored:", m.num_explored)
+    print("Peak Frontier:", m.max_frontier)
+    print(f"Time: {m.solve_time:.4f}s")
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True)
+
+
+if __name__ == "__main__":
+    main()
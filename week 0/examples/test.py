@@ -0,0 +1,116 @@
+import os
+import tempfile
+
+from benchmark import benchmark_case
+from generate import METHODS, generate
+from maze import Maze, SOLVERS
+
+# Algorithms guaranteed to find a shortest path
+OPTIMAL = ["bfs", "astar", "iddfs", "grid-bfs", "grid-astar"]
+
+
+def check_solution(m):
+    """
+    Checks the solution is a walk through open cells from start to goal
+    """
+    actions, cells = m.solution
+    assert len(actions) == len(cells)
+    state = m.start
+    for action, cell in zip(actions, cells):
+        assert (action, cell) in m.neighbors(state)
+        state = cell
+    assert state == m.goal
+
+
+def test_solvers():
+    for filename in ["maze1.txt", "maze2.txt", "maze3.txt"]:
+        lengths = {}
+        for algorithm in SOLVERS:
+            m = Maze(filename)
+            m.solve(algorithm)
+            check_solution(m)
+            assert m.num_explored > 0 and m.max_frontier > 0
+            assert m.solve_time >= 0
+            lengths[algorithm] = len(m.solution[0])
+        shortest = min(lengths.values())
+        for algorithm in OPTIMAL:
+            assert lengths[algorithm] == shortest
+
+
+def test_no_solution():
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write("A#B\n")
+    try:
+        for algorithm in SOLVERS:
+            m = Maze(f.name)
+            try:
+                m.solve(algorithm)
+            except Exception as e:
+                assert str(e) == "no solution"
+            else:
+                raise AssertionError(f"{algorithm} solved a blocked maze")
+    finally:
+        os.remove(f.name)
+
+
+def test_render_matches_draw():
+    try:
+        import numpy as np
+        import PIL  # noqa: F401
+    except ImportError:
+        print("test_render_matches_draw: skipped, needs numpy and pillow")
+        return
+    for algorithm in ["dfs", "grid-bfs"]:
+        m = Maze("maze2.txt")
+        m.solve(algorithm)
+        for show_solution in [False, True]:
+            for show_explored in [False, True]:
+                for cell_size, cell_border in [(50, 2), (7, 3), (1, 0)]:
+                    frame = m.render_frame(np, cell_size, cell_border,
+                                           show_solution, show_explored)
+                    drawn = np.array(m.draw_image(cell_size, cell_border,
+                                                  show_solution, show_explored))
+                    assert (frame == drawn).all()
+
+
+def test_generate():
+    for method in METHODS:
+        for height, width in [(3, 5), (10, 16), (31, 41)]:
+            text = generate(height, width, method, seed=7)
+            assert text == generate(height, width, method, seed=7)
+            lines = text.splitlines()
+            assert len(lines) == height
+            assert all(len(line) == width for line in lines)
+            with tempfile.NamedTemporaryFile("w", suffix=".txt",
+                                             delete=False) as f:
+                f.write(text)
+            try:
+                lengths = {}
+                for algorithm in ["dfs", "grid-bfs"]:
+                    m = Maze(f.name)
+                    m.solve(algorithm)
+                    check_solution(m)
+                    lengths[algorithm] = len(m.solution[0])
+            finally:
+                os.remove(f.name)
+            # Perfect mazes have exactly one path, even for depth-first search
+            if method != "rooms":
+                assert lengths["dfs"] == lengths["grid-bfs"]
+    assert generate(31, 41, "prim", seed=1) != generate(31, 41, "prim", seed=2)
+
+
+def test_benchmark_case():
+    case = benchmark_case("prim", 21, 21, 0, ["bfs", "iddfs", "degrees-bfs"])
+    results = {result["solver"]: result for result in case["results"]}
+    assert results["degrees-bfs"]["length"] == results["bfs"]["length"]
+    assert results["degrees-bfs"]["peak_bytes"] > 0
+    case = benchmark_case("rooms", 101, 101, 0, ["iddfs"], memory=False)
+    assert "skipped" in case["results"][0]
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items())
+             if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"{test.__name__}: OK")
@@ -1,8 +1,18 @@
+import argparse
 import csv
+import json
+import multiprocessing
+import os
 import sys
 import math
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import IngestReport, load_graph
+from landmarks import landmark_index
+from util import (Node, StackFrontier, QueueFrontier, LRUCache,
+                  bidirectional_search, breadth_first_tree)
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -13,15 +23,46 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# CompactGraph holding the data when loaded with load_compact_data
+graph = None
 
-def load_data(directory):
+# Neighbor sets of recently expanded people, only used with the dict
+# loader as CompactGraph reads neighbors straight from its arrays
+neighbor_cache = LRUCache(maxsize=4096)
+
+# LandmarkIndex over graph, loaded with load_landmarks
+landmarks = None
+
+# IngestReport of the last load that parsed CSV files
+load_report = None
+
+
+def load_data(directory, cache=False, **filters):
     """
     Load data from CSV files into memory.
+
+    With cache, the dictionaries are filled from the binary snapshot
+    that load_compact_data uses instead of parsing the CSV files.
+    filters (min_year, max_year, min_stars) are passed to
+    graph.parse_graph, which streams the files and keeps only
+    the matching part of the data.
     """
+    global load_report
+    neighbor_cache.clear()
+    if cache or filters:
+        compact = load_graph(directory, cache=cache, **filters)
+        load_data_from_graph(compact)
+        load_report = compact.report
+        return
+
+    load_report = IngestReport()
+    start = time.perf_counter()
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
+            load_report.read("people.csv")
             people[row["id"]] = {
                 "name": row["name"],
                 "birth": row["birth"],
@@ -36,6 +77,7 @@ def load_data(directory):
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
+            load_report.read("movies.csv")
             movies[row["id"]] = {
                 "title": row["title"],
                 "year": row["year"],
@@ -46,22 +88,155 @@ def load_data(directory):
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            try:
+            load_report.read("stars.csv")
+            if row["person_id"] not in people:
+                load_report.skip("stars.csv", "unknown person_id")
+            elif row["movie_id"] not in movies:
+                load_report.skip("stars.csv", "unknown movie_id")
+            else:
                 people[row["person_id"]]["movies"].add(row["movie_id"])
                 movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    load_report.seconds = time.perf_counter() - start
+
+
+def load_data_from_graph(compact):
+    """
+    Fills names, people and movies from a CompactGraph.
+    """
+    for index, person_id in enumerate(compact.person_ids):
+        people[person_id] = {
+            "name": compact.person_names[index],
+            "birth": compact.person_births[index],
+            "movies": {compact.movie_ids[movie]
+                       for movie in compact.movies_of(index)}
+        }
+    for index, movie_id in enumerate(compact.movie_ids):
+        movies[movie_id] = {
+            "title": compact.movie_titles[index],
+            "year": compact.movie_years[index],
+            "stars": {compact.person_ids[star]
+                      for star in compact.stars_of(index)}
+        }
+    for name, person_ids in compact.names.items():
+        names.setdefault(name, set()).update(person_ids)
+
+
+def load_compact_data(directory, cache=True, **filters):
+    """
+    Load data from CSV files into an integer-indexed CompactGraph.
+    Uses far less memory than load_data on large datasets.
+
+    With cache, a binary snapshot of the CSV files is reused
+    across runs and only rebuilt when the files change.
+    filters are the same as for load_data.
+    """
+    global graph, load_report
+    neighbor_cache.clear()
+    graph = load_graph(directory, cache=cache, **filters)
+    load_report = graph.report
+    names.update(graph.names)
+
+
+def load_landmarks(directory, k=16, cache=True):
+    """
+    Loads (or builds and saves) the landmark distance index used by
+    shortest_path_landmarks. Needs data loaded with load_compact_data.
+    """
+    global landmarks
+    landmarks = landmark_index(graph, directory, k, cache=cache)
+
+
+def parse_args(argv=None):
+    """
+    Parses command line arguments for degrees.py
+    """
+    parser = argparse.ArgumentParser(
+        description="Degrees of separation between two actors.")
+    parser.add_argument("directory", nargs="?", default="large",
+                        help="directory with people, movies and stars CSVs")
+    parser.add_argument("--algorithm", choices=sorted(ALGORITHMS),
+                        default="bfs",
+                        help="search used to find the shortest path")
+    parser.add_argument("--loader", choices=sorted(LOADERS),
+                        default="compact",
+                        help="in-memory representation of the data")
+    parser.add_argument("--landmarks", metavar="K", type=int, default=16,
+                        help="landmarks in the index for --algorithm alt")
+    parser.add_argument("--neighbor-cache", metavar="N", type=int,
+                        default=neighbor_cache.maxsize,
+                        help="people whose neighbors are kept cached "
+                             "with --loader dict (0 disables the cache)")
+    parser.add_argument("--min-year", type=int,
+                        help="only load movies from this year on")
+    parser.add_argument("--max-year", type=int,
+                        help="only load movies up to this year")
+    parser.add_argument("--min-stars", type=int,
+                        help="only load movies with at least this many stars")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="parse the CSV files instead of using "
+                             "or writing the binary snapshot")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--batch", metavar="FILE",
+                      help="answer 'source,target' lines from FILE "
+                           "('-' for stdin) as JSON lines")
+    mode.add_argument("--serve", metavar="PORT", type=int,
+                      help="answer queries over HTTP on localhost:PORT")
+    mode.add_argument("--histogram", action="store_true",
+                      help="print how many people are at each degree "
+                           "of separation from one person")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes answering --batch queries")
+    args = parser.parse_args(argv)
+    if args.algorithm == "alt" and args.loader != "compact":
+        parser.error("--algorithm alt needs --loader compact")
+    if args.workers is not None and args.batch is None:
+        parser.error("--workers only applies to --batch")
+    return args
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = parse_args()
+    search = ALGORITHMS[args.algorithm]
+    neighbor_cache.maxsize = args.neighbor_cache
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    # Keep stdout clean for JSON lines in batch mode
+    log = sys.stderr if args.batch is not None else sys.stdout
+    print("Loading data...", file=log)
+    filters = {
+        name: getattr(args, name)
+        for name in ["min_year", "max_year", "min_stars"]
+        if getattr(args, name) is not None
+    }
+    LOADERS[args.loader](args.directory, cache=not args.no_cache, **filters)
+    if load_report is not None:
+        for line in load_report.summary():
+            print(line, file=log)
+    if args.algorithm == "alt":
+        load_landmarks(args.directory, args.landmarks,
+                       cache=not args.no_cache)
+    print("Data loaded.", file=log)
+
+    if args.batch is not None:
+        if args.batch == "-":
+            run_batch(sys.stdin, search, workers=args.workers or 1)
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                run_batch(f, search, workers=args.workers or 1)
+        if graph is None:
+            info = neighbor_cache.info()
+            print(f"Neighbor cache: {info['hits']} hits, "
+                  f"{info['misses']} misses", file=log)
+        return
+    if args.serve is not None:
+        serve(args.serve, search)
+        return
+    if args.histogram:
+        source = person_id_for_name(input("Name: "))
+        if source is None:
+            sys.exit("Person not found.")
+        print_histogram(source)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -70,7 +245,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = search(source, target)
 
     if path is None:
         print("Not connected.")
@@ -79,9 +254,9 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_details(path[i][1])["name"]
+            person2 = person_details(path[i + 1][1])["name"]
+            movie = movie_title(path[i + 1][0])
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
@@ -105,13 +280,22 @@ def check_if_goal(node, target):
     return None
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, lazy=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    With lazy, neighbors are generated one at a time and not cached,
+    so expanding a prolific actor stops as soon as the target shows up.
+    Data loaded into a CompactGraph is searched by the graph itself,
+    which uses neither lazy nor the neighbor cache.
+
     If no possible path, returns None.
     """
+    if graph is not None:
+        return graph.shortest_path(source, target)
+
+    neighbors = iter_neighbors if lazy else neighbors_for_person
 
     # Set source as root node
     start = Node(state=source, parent=None, action=None)
@@ -146,7 +330,7 @@ def shortest_path(source, target):
         explored_people.add(node.state)
 
         # Add node's neighbors to frontier
-        for movie, person in neighbors_for_person(node.state):
+        for movie, person in neighbors(node.state):
             if not frontier.contains_state(
                     person) and person not in explored_people:
                 child = Node(state=person, parent=node, action=(movie, person))
@@ -158,6 +342,58 @@ def shortest_path(source, target):
     return None
 
 
+def shortest_path_bidirectional(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching from both
+    ends at once and meeting in the middle.
+
+    If no possible path, returns None.
+    """
+    if graph is not None:
+        return graph.shortest_path_bidirectional(source, target)
+    return bidirectional_search(source, target, neighbors_for_person)
+
+
+def shortest_path_landmarks(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using A* with landmark
+    lower bounds. Falls back to shortest_path without an index.
+
+    If no possible path, returns None.
+    """
+    if graph is None or landmarks is None:
+        return shortest_path(source, target)
+    return landmarks.shortest_path(source, target)
+
+
+def single_source(source):
+    """
+    Returns a search tree with the degrees of separation between
+    source and everyone reachable from them. Its path_to(target)
+    gives the same (movie_id, person_id) path format as shortest_path
+    without searching again.
+    """
+    if graph is not None:
+        return graph.breadth_first_tree(source)
+    return breadth_first_tree(source, neighbors_for_person)
+
+
+def print_histogram(source):
+    """
+    Prints how many people are at each degree of separation from source.
+    """
+    tree = single_source(source)
+    histogram = tree.histogram()
+    total = len(graph.person_ids) if graph is not None else len(people)
+    name = person_details(source)["name"]
+    print(f"Degrees of separation from {name}:")
+    for degrees in sorted(histogram):
+        print(f"{degrees:>3}: {histogram[degrees]}")
+    print(f"Not connected: {total - sum(histogram.values())}")
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -169,7 +405,7 @@ def person_id_for_name(name):
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = person_details(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -188,13 +424,226 @@ def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
+
+    Results are kept in an LRU cache, see neighbor_cache.info().
+    """
+    return neighbor_cache.get(person_id, compute_neighbors)
+
+
+def compute_neighbors(person_id):
+    """
+    Builds the frozenset of (movie_id, person_id) neighbor pairs
+    of a person without going through the cache.
+    """
+    return frozenset(iter_neighbors(person_id))
+
+
+def iter_neighbors(person_id):
+    """
+    Yields (movie_id, person_id) pairs for people who starred with
+    a given person one at a time, so a search can stop as soon as
+    it sees its goal. Pairs may repeat when two people share
+    several movies. Uses the cached set when there is one.
+    """
+    cached = neighbor_cache.peek(person_id)
+    if cached is not None:
+        yield from cached
+    elif graph is not None:
+        for movie, star in graph.neighbors(graph.person_index[person_id]):
+            yield graph.movie_ids[movie], graph.person_ids[star]
+    else:
+        for movie_id in people[person_id]["movies"]:
+            for star_id in movies[movie_id]["stars"]:
+                yield movie_id, star_id
+
+
+def person_details(person_id):
+    """
+    Returns a dictionary with the name and birth of a person.
+    """
+    if graph is not None:
+        index = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[index],
+            "birth": graph.person_births[index]
+        }
+    return people[person_id]
+
+
+def movie_title(movie_id):
+    """
+    Returns the title of a movie.
+    """
+    if graph is not None:
+        return graph.movie_titles[graph.movie_index[movie_id]]
+    return movies[movie_id]["title"]
+
+
+def resolve_person(name):
+    """
+    Returns the person_id for a person_id or name without prompting.
+    Raises ValueError if no person or more than one person matches.
+    """
+    if (graph is not None and name in graph.person_index) or name in people:
+        return name
+    person_ids = names.get(name.lower(), set())
+    if len(person_ids) == 0:
+        raise ValueError(f"Person not found: {name}")
+    if len(person_ids) > 1:
+        ids = ", ".join(sorted(person_ids))
+        raise ValueError(f"Ambiguous name {name}, use one of IDs: {ids}")
+    return next(iter(person_ids))
+
+
+def answer_query(source, target, search=shortest_path):
+    """
+    Answers a single source, target query given as names or person_ids.
+    Returns a JSON-serializable dictionary with the result.
+    """
+    answer = {"source": source, "target": target}
+    try:
+        source_id = resolve_person(source)
+        target_id = resolve_person(target)
+    except ValueError as e:
+        answer["error"] = str(e)
+        return answer
+
+    path = search(source_id, target_id)
+    if path is None:
+        answer["degrees"] = None
+        answer["path"] = None
+    else:
+        answer["degrees"] = len(path)
+        answer["path"] = [
+            {
+                "movie_id": movie_id,
+                "movie": movie_title(movie_id),
+                "person_id": person_id,
+                "person": person_details(person_id)["name"]
+            }
+            for movie_id, person_id in path
+        ]
+    return answer
+
+
+def run_batch(lines, search=shortest_path, out=None, workers=1):
+    """
+    Answers 'source,target' CSV lines, writing one JSON line per query
+    to out (sys.stdout by default).
+    Blank lines and lines starting with '#' are skipped.
+    Answers are written in input order, even with several workers.
+    """
+    if out is None:
+        out = sys.stdout
+    rows = (
+        (row, search) for row in csv.reader(lines)
+        if row and not row[0].startswith("#")
+    )
+    for answer in map_parallel(answer_row, rows, workers):
+        out.write(json.dumps(answer) + "\n")
+        out.flush()
+
+
+def answer_row(row, search):
+    """
+    Answers a single parsed 'source,target' batch row.
+    """
+    if len(row) != 2:
+        return {"error": f"Expected 'source,target': {','.join(row)}"}
+    return answer_query(row[0].strip(), row[1].strip(), search)
+
+
+def shortest_paths(pairs, workers=None, search=shortest_path):
+    """
+    Returns the shortest path for each (source, target) pair,
+    in the same order and with the same results as calling
+    search on every pair.
+
+    Queries are spread across workers processes (all CPUs if None).
+    """
+    return list(map_parallel(search, pairs, workers))
+
+
+def map_parallel(function, argument_tuples, workers=None):
+    """
+    Yields function(*arguments) for each of argument_tuples in order.
+
+    Workers are forked so they share the loaded data with this process
+    copy-on-write instead of loading or pickling it again. Runs serially
+    with a single worker or where fork is not available.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        for arguments in argument_tuples:
+            yield function(*arguments)
+        return
+
+    with multiprocessing.get_context("fork").Pool(workers) as pool:
+        yield from pool.imap(call_with, (
+            (function, arguments) for arguments in argument_tuples
+        ), chunksize=16)
+
+
+def call_with(task):
+    """
+    Calls function with arguments for a (function, arguments) task
+    """
+    function, arguments = task
+    return function(*arguments)
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Answers GET /?source=...&target=... with the JSON from answer_query.
+    """
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        if "source" not in query or "target" not in query:
+            self.send_json(400, {"error": "source and target are required"})
+            return
+        answer = answer_query(query["source"][0], query["target"][0],
+                              self.server.search)
+        self.send_json(400 if "error" in answer else 200, answer)
+
+    def send_json(self, status, body):
+        encoded = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+
+def serve(port, search=shortest_path):
+    """
+    Serves queries on localhost:port until interrupted.
+    Each request runs on its own thread against the loaded data.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    server = ThreadingHTTPServer(("127.0.0.1", port), QueryHandler)
+    server.search = search
+    print(f"Serving on http://127.0.0.1:{port}/?source=...&target=...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# Ways of loading the data selectable with --loader
+LOADERS = {
+    "dict": load_data,
+    "compact": load_compact_data
+}
+
+# Search algorithms selectable with --algorithm
+ALGORITHMS = {
+    "bfs": shortest_path,
+    "bidir": shortest_path_bidirectional,
+    "alt": shortest_path_landmarks
+}
 
 
 if __name__ == "__main__":
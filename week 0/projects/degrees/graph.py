@@ -0,0 +1,632 @@
+"""
+Compact integer-indexed store for the degrees data.
+
+Person and movie ids are interned to dense integers and the
+person -> movies and movie -> stars relations are kept as CSR
+(compressed sparse row) adjacency arrays, which is a lot smaller
+than the dict of dicts of sets built by degrees.load_data.
+"""
+
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import tracemalloc
+from array import array
+from collections import Counter, deque
+
+from util import bidirectional_search
+
+# Type code used for every index array
+INDEX_TYPE = "l"
+
+# CSV files the graph is built from
+CSV_FILES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Binary snapshot written next to the CSV files
+SNAPSHOT_NAME = "degrees.snapshot"
+SNAPSHOT_MAGIC = b"DEGSNAP1"
+
+# Attributes holding the CSR arrays and the string tables
+ARRAY_FIELDS = ["person_offsets", "person_movies",
+                "movie_offsets", "movie_stars"]
+STRING_FIELDS = ["person_ids", "person_names", "person_births",
+                 "movie_ids", "movie_titles", "movie_years", "names"]
+
+
+class CompactGraph():
+    def __init__(self):
+        # Interned ids, names and details, indexed by dense integers
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = []
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = []
+
+        # Maps string ids back to their dense integers
+        self.person_index = {}
+        self.movie_index = {}
+
+        # Maps lowercase names to a set of corresponding person_ids
+        self.names = {}
+
+        # CSR adjacency, movies of person p are
+        # person_movies[person_offsets[p]:person_offsets[p + 1]]
+        self.person_offsets = array(INDEX_TYPE, [0])
+        self.person_movies = array(INDEX_TYPE)
+        self.movie_offsets = array(INDEX_TYPE, [0])
+        self.movie_stars = array(INDEX_TYPE)
+
+        # Memory map backing the arrays when loaded from a snapshot
+        self.snapshot = None
+
+        # IngestReport of the parse that built the graph, if parsed
+        self.report = None
+
+    def add_person(self, person_id, name, birth):
+        """
+        Interns a person and returns their dense index.
+        A person_id seen before keeps its first entry.
+        """
+        if person_id in self.person_index:
+            return self.person_index[person_id]
+        index = len(self.person_ids)
+        self.person_index[person_id] = index
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        self.names.setdefault(name.lower(), set()).add(person_id)
+        return index
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Interns a movie and returns its dense index.
+        A movie_id seen before keeps its first entry.
+        """
+        if movie_id in self.movie_index:
+            return self.movie_index[movie_id]
+        index = len(self.movie_ids)
+        self.movie_index[movie_id] = index
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        return index
+
+    def build(self, star_people, star_movies):
+        """
+        Builds both CSR adjacencies from parallel arrays of
+        (person index, movie index) star pairs.
+        """
+        self.person_offsets, self.person_movies = build_csr(
+            len(self.person_ids), star_people, star_movies)
+        self.movie_offsets, self.movie_stars = build_csr(
+            len(self.movie_ids), star_movies, star_people)
+
+    def movies_of(self, person):
+        """
+        Returns movie indexes for a person index
+        """
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns person indexes for a movie index
+        """
+        return self.movie_stars[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie index, person index) pairs for people
+        who starred with a given person index.
+        """
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                yield movie, star
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        return {
+            (self.movie_ids[movie], self.person_ids[star])
+            for movie, star in self.neighbors(self.person_index[person_id])
+        }
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        source = self.person_index[source]
+        target = self.person_index[target]
+        if source == target:
+            return []
+
+        # Maps each reached person to their (parent person, movie),
+        # a dict keeps the cost proportional to the explored part
+        parents = {source: None}
+
+        frontier = deque([source])
+        while frontier:
+            person = frontier.popleft()
+            for movie, star in self.neighbors(person):
+                if star in parents:
+                    continue
+                parents[star] = (person, movie)
+                if star == target:
+                    return self.path_to(target, parents)
+                frontier.append(star)
+        return None
+
+    def shortest_path_bidirectional(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, searching from both
+        ends at once over person indexes.
+
+        If no possible path, returns None.
+        """
+        path = bidirectional_search(self.person_index[source],
+                                    self.person_index[target],
+                                    self.neighbors)
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+    def breadth_first_tree(self, source):
+        """
+        Returns a CompactSearchTree with the distance and parent of
+        every person reachable from source.
+        """
+        source = self.person_index[source]
+        size = len(self.person_ids)
+        parent_person = array(INDEX_TYPE, [-1]) * size
+        parent_movie = array(INDEX_TYPE, [-1]) * size
+        distance = array(INDEX_TYPE, [-1]) * size
+        distance[source] = 0
+
+        frontier = deque([source])
+        while frontier:
+            person = frontier.popleft()
+            for movie, star in self.neighbors(person):
+                if distance[star] != -1:
+                    continue
+                distance[star] = distance[person] + 1
+                parent_person[star] = person
+                parent_movie[star] = movie
+                frontier.append(star)
+        return CompactSearchTree(self, source, parent_person,
+                                 parent_movie, distance)
+
+    def path_to(self, target, parents):
+        """
+        Walks parents back from target to the search root and returns
+        the (movie_id, person_id) path.
+        """
+        path = []
+        person = target
+        while parents[person] is not None:
+            previous, movie = parents[person]
+            path.append((self.movie_ids[movie], self.person_ids[person]))
+            person = previous
+        path.reverse()
+        return path
+
+
+class CompactSearchTree():
+    """
+    Single-source breadth-first search tree over a CompactGraph,
+    with parents and distances as arrays indexed by person index.
+    Unreached people have distance -1.
+    """
+
+    def __init__(self, graph, source, parent_person, parent_movie, distance):
+        self.graph = graph
+        self.source = source
+        self.parent_person = parent_person
+        self.parent_movie = parent_movie
+        self.distances = distance
+
+    def distance(self, target):
+        """
+        Returns degrees of separation between source and target,
+        None if target is unreachable.
+        """
+        distance = self.distances[self.graph.person_index[target]]
+        return None if distance == -1 else distance
+
+    def path_to(self, target):
+        """
+        Returns the (movie_id, person_id) path from source to target
+        in O(path length), None if target is unreachable.
+        """
+        person = self.graph.person_index[target]
+        if self.distances[person] == -1:
+            return None
+        path = []
+        while person != self.source:
+            path.append((self.graph.movie_ids[self.parent_movie[person]],
+                         self.graph.person_ids[person]))
+            person = self.parent_person[person]
+        path.reverse()
+        return path
+
+    def histogram(self):
+        """
+        Returns a Counter of how many people are at each distance.
+        """
+        histogram = Counter(self.distances)
+        del histogram[-1]
+        return histogram
+
+
+def build_csr(size, rows, columns):
+    """
+    Counting sort of (row, column) pairs into CSR offsets and values.
+    """
+    offsets = array(INDEX_TYPE, [0]) * (size + 1)
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    values = array(INDEX_TYPE, [0]) * len(rows)
+    position = array(INDEX_TYPE, offsets[:-1])
+    for row, column in zip(rows, columns):
+        values[position[row]] = column
+        position[row] += 1
+    return offsets, values
+
+
+def load_graph(directory, cache=True, **filters):
+    """
+    Load data from CSV files into a CompactGraph.
+
+    If cache is True, a binary snapshot next to the CSV files is
+    memory-mapped instead when it is still up to date, otherwise
+    the CSV files are parsed and a fresh snapshot is written.
+    The snapshot holds the full data, so filters for parse_graph
+    always parse the CSV files.
+    """
+    if not cache or filters:
+        return parse_graph(directory, **filters)
+
+    path = os.path.join(directory, SNAPSHOT_NAME)
+    signature = csv_signature(directory)
+    graph = load_snapshot(path, signature)
+    if graph is None:
+        graph = parse_graph(directory)
+        try:
+            save_snapshot(graph, path, signature)
+        except OSError:
+            # Read-only data directories just don't get a snapshot
+            pass
+    return graph
+
+
+class IngestReport():
+    """
+    Counts rows read and skipped (by reason) while parsing CSV files.
+    """
+
+    def __init__(self):
+        self.rows = Counter()
+        self.skipped = Counter()
+        self.seconds = 0.0
+
+    def read(self, name):
+        self.rows[name] += 1
+
+    def skip(self, name, reason):
+        self.skipped[name, reason] += 1
+
+    def rows_per_second(self):
+        total = sum(self.rows.values())
+        return total / self.seconds if self.seconds else float(total)
+
+    def summary(self):
+        """
+        Returns lines describing what was read and skipped.
+        """
+        lines = [
+            f"Read {sum(self.rows.values())} rows in {self.seconds:.2f}s "
+            f"({self.rows_per_second():,.0f} rows/s)"
+        ]
+        for (name, reason), count in sorted(self.skipped.items()):
+            lines.append(f"Skipped {count} {name} rows: {reason}")
+        return lines
+
+
+def read_rows(directory, name, report=None):
+    """
+    Yields rows of a CSV file one at a time, counting them in report
+    unless it is None.
+    """
+    with open(os.path.join(directory, name), encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if report is not None:
+                report.read(name)
+            yield row
+
+
+def year_in_range(year, min_year, max_year):
+    """
+    Returns True if a movie year passes the optional year range.
+    Movies without a readable year only pass when there is no range.
+    """
+    if min_year is None and max_year is None:
+        return True
+    try:
+        year = int(year)
+    except ValueError:
+        return False
+    return ((min_year is None or year >= min_year)
+            and (max_year is None or year <= max_year))
+
+
+def parse_graph(directory, min_year=None, max_year=None, min_stars=None):
+    """
+    Parse CSV files into a CompactGraph, streaming them row by row.
+
+    Movies can be filtered by year range and by a minimum number of
+    stars. People who star in no kept movie are then left out too, so
+    a reduced graph never holds the rest of the data. Skipped rows are
+    counted in the graph's report (an IngestReport).
+    """
+    report = IngestReport()
+    start = time.perf_counter()
+    graph = CompactGraph()
+    filtering = (min_year, max_year, min_stars) != (None, None, None)
+
+    # Movies passing the year range, not interned until stars are counted
+    candidates = {}
+    # Ids of movies left out, to tell them apart from unknown ids
+    filtered_movies = set()
+    for row in read_rows(directory, "movies.csv", report):
+        if row["id"] in candidates or row["id"] in filtered_movies:
+            report.skip("movies.csv", "duplicate id")
+        elif not year_in_range(row["year"], min_year, max_year):
+            report.skip("movies.csv", "year out of range")
+            filtered_movies.add(row["id"])
+        else:
+            candidates[row["id"]] = (row["title"], row["year"])
+
+    # With a star minimum, count stars per movie before keeping any.
+    # Passes over stars.csv before the last are not counted as reads.
+    kept_people = None
+    if min_stars:
+        counts = Counter()
+        for row in read_rows(directory, "stars.csv"):
+            if row["movie_id"] in candidates:
+                counts[row["movie_id"]] += 1
+        for movie_id in list(candidates):
+            if counts[movie_id] < min_stars:
+                report.skip("movies.csv", "too few stars")
+                filtered_movies.add(movie_id)
+                del candidates[movie_id]
+    for movie_id, (title, year) in candidates.items():
+        graph.add_movie(movie_id, title, year)
+    del candidates
+
+    if filtering:
+        kept_people = set()
+        for row in read_rows(directory, "stars.csv"):
+            if row["movie_id"] in graph.movie_index:
+                kept_people.add(row["person_id"])
+
+    # People
+    for row in read_rows(directory, "people.csv", report):
+        if row["id"] in graph.person_index:
+            report.skip("people.csv", "duplicate id")
+        elif kept_people is not None and row["id"] not in kept_people:
+            report.skip("people.csv", "in no kept movie")
+        else:
+            graph.add_person(row["id"], row["name"], row["birth"])
+
+    # Stars, skipping rows with unknown ids like load_data does
+    star_people = array(INDEX_TYPE)
+    star_movies = array(INDEX_TYPE)
+    for row in read_rows(directory, "stars.csv", report):
+        person = graph.person_index.get(row["person_id"])
+        movie = graph.movie_index.get(row["movie_id"])
+        if movie is None:
+            if row["movie_id"] in filtered_movies:
+                report.skip("stars.csv", "movie filtered out")
+            else:
+                report.skip("stars.csv", "unknown movie_id")
+            continue
+        if person is None:
+            report.skip("stars.csv", "unknown person_id")
+            continue
+        star_people.append(person)
+        star_movies.append(movie)
+
+    graph.build(star_people, star_movies)
+    report.seconds = time.perf_counter() - start
+    graph.report = report
+    return graph
+
+
+def csv_signature(directory):
+    """
+    Returns [name, mtime, size] of each CSV file,
+    a snapshot is only valid for the signature it was written with.
+    """
+    signature = []
+    for name in CSV_FILES:
+        stat = os.stat(os.path.join(directory, name))
+        signature.append([name, stat.st_mtime_ns, stat.st_size])
+    return signature
+
+
+def save_snapshot(graph, path, signature):
+    """
+    Writes graph to a binary snapshot at path.
+
+    Layout is the magic bytes, the length of a JSON header, the header,
+    then a data section holding the raw CSR arrays and the string
+    tables as UTF-8 JSON. Header offsets are relative to the data section,
+    which starts aligned so the arrays can be mapped in place.
+    """
+    itemsize = array(INDEX_TYPE).itemsize
+    header = {
+        "signature": signature,
+        "index_type": INDEX_TYPE,
+        "itemsize": itemsize,
+        "arrays": {}
+    }
+    offset = 0
+    for field in ARRAY_FIELDS:
+        length = len(getattr(graph, field))
+        header["arrays"][field] = [offset, length]
+        offset += length * itemsize
+    tables = [getattr(graph, field) for field in STRING_FIELDS]
+    # JSON has no sets, names are stored as sorted lists
+    tables[STRING_FIELDS.index("names")] = {
+        name: sorted(person_ids) for name, person_ids in graph.names.items()}
+    strings = json.dumps(tables).encode("utf-8")
+    header["strings"] = [offset, len(strings)]
+    encoded = json.dumps(header).encode("utf-8")
+
+    # Write to a temporary file first so readers never see half a snapshot
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(encoded)
+        f.write(bytes(data_start(len(encoded), itemsize) - f.tell()))
+        for field in ARRAY_FIELDS:
+            f.write(getattr(graph, field).tobytes())
+        f.write(strings)
+    os.replace(temporary, path)
+
+
+def load_snapshot(path, signature):
+    """
+    Memory-maps a snapshot written by save_snapshot.
+    Returns None if there is no snapshot, it is out of date
+    or it is damaged, so the caller can parse the CSV files again.
+    """
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            return None
+        try:
+            header_size, = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_size))
+            itemsize = header["itemsize"]
+            strings_start, strings_length = header["strings"]
+            arrays = header["arrays"]
+        except (struct.error, ValueError, TypeError, KeyError):
+            return None
+        if (header.get("signature") != signature
+                or header.get("index_type") != INDEX_TYPE
+                or itemsize != array(INDEX_TYPE).itemsize
+                or set(arrays) != set(ARRAY_FIELDS)):
+            return None
+
+        # A truncated or padded file can't be trusted
+        base = data_start(header_size, itemsize)
+        size = os.fstat(f.fileno()).st_size
+        if size != base + strings_start + strings_length:
+            return None
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    graph = CompactGraph()
+    try:
+        start = base + strings_start
+        tables = json.loads(data[start:start + strings_length])
+        if len(tables) != len(STRING_FIELDS):
+            return None
+        for field, value in zip(STRING_FIELDS, tables):
+            setattr(graph, field, value)
+        graph.names = {
+            name: set(person_ids) for name, person_ids in graph.names.items()}
+
+        # Arrays are views straight into the mapped file
+        view = memoryview(data)
+        for field, (start, length) in arrays.items():
+            start += base
+            setattr(graph, field,
+                    view[start:start + length * itemsize].cast(INDEX_TYPE))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+    graph.person_index = {
+        person_id: i for i, person_id in enumerate(graph.person_ids)}
+    graph.movie_index = {
+        movie_id: i for i, movie_id in enumerate(graph.movie_ids)}
+    graph.snapshot = data
+    return graph
+
+
+def data_start(header_size, itemsize):
+    """
+    Returns offset of a snapshot's data section, the first
+    multiple of itemsize after the header
+    """
+    offset = len(SNAPSHOT_MAGIC) + 8 + header_size
+    return (offset + itemsize - 1) // itemsize * itemsize
+
+
+def measure(loader, directory, reset):
+    """
+    Returns (seconds, retained bytes, peak bytes) for loader(directory).
+    Time is measured without tracing, reset() drops loaded data
+    before each run so every run starts from scratch.
+    """
+    reset()
+    start = time.perf_counter()
+    loader(directory)
+    seconds = time.perf_counter() - start
+
+    reset()
+    tracemalloc.start()
+    loader(directory)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    reset()
+    return seconds, retained, peak
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python graph.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    import degrees
+
+    def reset():
+        degrees.names.clear()
+        degrees.people.clear()
+        degrees.movies.clear()
+        degrees.graph = None
+
+    print(f"{'loader':<10}{'seconds':>10}{'MiB':>10}{'peak MiB':>10}")
+    loaders = [
+        ("dict", lambda d: degrees.load_data(d, cache=False)),
+        ("compact", lambda d: degrees.load_compact_data(d, cache=False)),
+        ("snapshot", degrees.load_compact_data)
+    ]
+    load_graph(directory)
+    for name, loader in loaders:
+        seconds, retained, peak = measure(loader, directory, reset)
+        print(f"{name:<10}{seconds:>10.3f}"
+              f"{retained / 2 ** 20:>10.1f}{peak / 2 ** 20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Landmark distance index for ALT (A*, landmarks, triangle inequality)
+searches over a CompactGraph.
+
+Breadth-first distances from a few well connected people give a lower
+bound on the distance between any two people, which directs A* toward
+the target without ever losing exactness.
+"""
+
+import heapq
+import json
+import os
+import struct
+from array import array
+
+from graph import SNAPSHOT_MAGIC, csv_signature, data_start
+
+# Index file written next to the CSV files
+LANDMARKS_NAME = "degrees.landmarks"
+
+# Distances are small, 16 bits keep the index compact. -1 is unreachable
+DISTANCE_TYPE = "h"
+
+
+class LandmarkIndex():
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        # Person indexes of the landmarks
+        self.landmarks = landmarks
+        # One distance array per landmark, indexed by person index
+        self.distances = distances
+
+    def lower_bound(self, person, target):
+        """
+        Returns a lower bound on the distance between two person indexes,
+        None if they are known to be in different components.
+        """
+        bound = 0
+        for distance in self.distances:
+            a = distance[person]
+            b = distance[target]
+            if (a == -1) != (b == -1):
+                return None
+            if a != -1 and abs(a - b) > bound:
+                bound = abs(a - b)
+        return bound
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, using A* guided by
+        landmark lower bounds.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        source = graph.person_index[source]
+        target = graph.person_index[target]
+        if self.lower_bound(source, target) is None:
+            return None
+
+        # The bound is consistent, so a person's first pop is final
+        parents = {source: None}
+        cost = {source: 0}
+        frontier = [(self.lower_bound(source, target), 0, source)]
+        done = set()
+        while frontier:
+            _, negative_steps, person = heapq.heappop(frontier)
+            if person == target:
+                return graph.path_to(target, parents)
+            if person in done:
+                continue
+            done.add(person)
+            steps = 1 - negative_steps
+            for movie, star in graph.neighbors(person):
+                if star in done or cost.get(star, steps + 1) <= steps:
+                    continue
+                bound = self.lower_bound(star, target)
+                if bound is None:
+                    continue
+                cost[star] = steps
+                parents[star] = (person, movie)
+                # Among equal estimates prefer people further along
+                heapq.heappush(frontier, (steps + bound, -steps, star))
+        return None
+
+    def save(self, path, signature):
+        """
+        Writes the index to path, laid out like the graph snapshot:
+        magic, JSON header length, header, then the distance arrays.
+        """
+        itemsize = array(DISTANCE_TYPE).itemsize
+        header = {
+            "signature": signature,
+            "distance_type": DISTANCE_TYPE,
+            "people": len(self.graph.person_ids),
+            "landmarks": [self.graph.person_ids[person]
+                          for person in self.landmarks]
+        }
+        encoded = json.dumps(header).encode("utf-8")
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack("<Q", len(encoded)))
+            f.write(encoded)
+            f.write(bytes(data_start(len(encoded), itemsize) - f.tell()))
+            for distance in self.distances:
+                f.write(distance.tobytes())
+        os.replace(temporary, path)
+
+
+def build_index(graph, k=16):
+    """
+    Returns a LandmarkIndex over the k people with the most co-stars.
+    """
+    def degree(person):
+        return sum(len(graph.stars_of(movie))
+                   for movie in graph.movies_of(person))
+
+    landmarks = sorted(range(len(graph.person_ids)),
+                       key=degree, reverse=True)[:k]
+    distances = []
+    for person in landmarks:
+        tree = graph.breadth_first_tree(graph.person_ids[person])
+        distances.append(array(DISTANCE_TYPE, tree.distances))
+    return LandmarkIndex(graph, landmarks, distances)
+
+
+def load_index(path, graph, signature):
+    """
+    Reads an index written by LandmarkIndex.save.
+    Returns None if there is none, it is out of date or damaged.
+    """
+    try:
+        with open(path, "rb") as f:
+            contents = f.read()
+    except OSError:
+        return None
+
+    itemsize = array(DISTANCE_TYPE).itemsize
+    start = len(SNAPSHOT_MAGIC) + 8
+    try:
+        if contents[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            return None
+        header_size, = struct.unpack("<Q", contents[len(SNAPSHOT_MAGIC):start])
+        header = json.loads(contents[start:start + header_size])
+        size = header["people"]
+        landmarks = [graph.person_index[person_id]
+                     for person_id in header["landmarks"]]
+    except (struct.error, ValueError, TypeError, KeyError):
+        return None
+    if (header.get("signature") != signature
+            or header.get("distance_type") != DISTANCE_TYPE
+            or size != len(graph.person_ids)):
+        return None
+
+    base = data_start(header_size, itemsize)
+    if len(contents) != base + len(landmarks) * size * itemsize:
+        return None
+    distances = []
+    for i in range(len(landmarks)):
+        offset = base + i * size * itemsize
+        distance = array(DISTANCE_TYPE)
+        distance.frombytes(contents[offset:offset + size * itemsize])
+        distances.append(distance)
+    return LandmarkIndex(graph, landmarks, distances)
+
+
+def landmark_index(graph, directory, k=16, cache=True):
+    """
+    Returns the landmark index for the graph loaded from directory,
+    reading it from disk when it is up to date with the CSV files
+    and has k landmarks, otherwise building and saving it.
+    """
+    path = os.path.join(directory, LANDMARKS_NAME)
+    signature = csv_signature(directory)
+    if cache:
+        index = load_index(path, graph, signature)
+        if index is not None and len(index.landmarks) == min(
+                k, len(graph.person_ids)):
+            return index
+
+    index = build_index(graph, k)
+    if cache:
+        try:
+            index.save(path, signature)
+        except OSError:
+            pass
+    return index
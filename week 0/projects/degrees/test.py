@@ -0,0 +1,492 @@
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import degrees
+import graph
+import landmarks
+import util
+from util import bidirectional_search
+
+
+def reset():
+    """
+    Drops any data loaded into the degrees module
+    """
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    degrees.graph = None
+
+
+def check_path(source, target, path):
+    """
+    Checks every step of path is a real co-star link
+    """
+    previous = source
+    for movie_id, person_id in path:
+        assert (movie_id, person_id) in degrees.neighbors_for_person(previous)
+        previous = person_id
+    assert previous == target
+
+
+def all_lengths(search):
+    """
+    Returns path length (or None) of search for every pair of people
+    """
+    people = sorted(degrees.names[name].copy().pop()
+                    for name in degrees.names)
+    lengths = {}
+    for source, target in itertools.product(people, repeat=2):
+        path = search(source, target)
+        if path is not None:
+            check_path(source, target, path)
+        lengths[source, target] = None if path is None else len(path)
+    return lengths
+
+
+def test_bidirectional_small():
+    reset()
+    degrees.load_data("small")
+    assert (all_lengths(degrees.shortest_path_bidirectional)
+            == all_lengths(degrees.shortest_path))
+
+
+def test_bidirectional_compact():
+    reset()
+    degrees.load_data("small")
+    expected = all_lengths(degrees.shortest_path)
+    reset()
+    degrees.load_compact_data("small", cache=False)
+    assert all_lengths(degrees.shortest_path_bidirectional) == expected
+
+
+def test_bidirectional_random_graphs():
+    random.seed(0)
+    for _ in range(300):
+        size = random.randint(1, 12)
+        edges = {}
+        for a, b in itertools.combinations(range(size), 2):
+            if random.random() < 0.2:
+                edges.setdefault(a, []).append((f"{a}-{b}", b))
+                edges.setdefault(b, []).append((f"{a}-{b}", a))
+
+        def neighbors(state):
+            return edges.get(state, [])
+
+        for source, target in itertools.product(range(size), repeat=2):
+            # Plain BFS distance to compare against
+            distance = {source: 0}
+            queue = [source]
+            for state in queue:
+                for _, neighbor in neighbors(state):
+                    if neighbor not in distance:
+                        distance[neighbor] = distance[state] + 1
+                        queue.append(neighbor)
+            path = bidirectional_search(source, target, neighbors)
+            if target not in distance:
+                assert path is None
+            else:
+                assert len(path) == distance[target]
+
+
+def test_compact_matches_dict():
+    reset()
+    degrees.load_data("small")
+    expected = all_lengths(degrees.shortest_path)
+    neighbors = {person_id: degrees.neighbors_for_person(person_id)
+                 for person_id in degrees.people}
+    reset()
+    degrees.load_compact_data("small", cache=False)
+    assert all_lengths(degrees.shortest_path) == expected
+    for person_id, expected_neighbors in neighbors.items():
+        assert degrees.neighbors_for_person(person_id) == expected_neighbors
+
+
+def test_compact_duplicate_ids():
+    directory = tempfile.mkdtemp()
+    try:
+        for name in ["people.csv", "movies.csv", "stars.csv"]:
+            with open(os.path.join("small", name), encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            # Repeat every data row so each id shows up twice
+            with open(os.path.join(directory, name), "w",
+                      encoding="utf-8") as f:
+                f.write("\n".join(lines + lines[1:]) + "\n")
+
+        reset()
+        degrees.load_data("small")
+        expected = all_lengths(degrees.shortest_path)
+        reset()
+        degrees.load_compact_data(directory, cache=False)
+        sources = {source for source, _ in expected}
+        assert len(degrees.graph.person_ids) == len(sources)
+        assert all_lengths(degrees.shortest_path) == expected
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_dict_loader_cache():
+    directory = copy_small()
+    try:
+        reset()
+        degrees.load_data(directory, cache=False)
+        expected = (dict(degrees.names), dict(degrees.people),
+                    dict(degrees.movies))
+        # Written on the first load, read back on the second
+        for _ in range(2):
+            reset()
+            degrees.load_data(directory, cache=True)
+            assert (degrees.names, degrees.people, degrees.movies) == expected
+        assert os.path.exists(os.path.join(directory, graph.SNAPSHOT_NAME))
+    finally:
+        shutil.rmtree(directory)
+
+
+def copy_small():
+    """
+    Returns a temporary copy of the small dataset
+    """
+    directory = tempfile.mkdtemp()
+    for name in graph.CSV_FILES:
+        shutil.copy(os.path.join("small", name), directory)
+    return directory
+
+
+def graph_lengths(compact):
+    """
+    Returns path lengths between every pair of people in compact
+    """
+    return {
+        (source, target): (None if path is None else len(path))
+        for source, target in itertools.product(compact.person_ids, repeat=2)
+        for path in [compact.shortest_path(source, target)]
+    }
+
+
+def test_snapshot_round_trip():
+    directory = copy_small()
+    try:
+        parsed = graph.load_graph(directory)
+        snapshot = os.path.join(directory, graph.SNAPSHOT_NAME)
+        assert os.path.exists(snapshot)
+        loaded = graph.load_graph(directory)
+        assert loaded.snapshot is not None
+        for field in graph.STRING_FIELDS:
+            assert getattr(loaded, field) == getattr(parsed, field)
+        for field in graph.ARRAY_FIELDS:
+            assert list(getattr(loaded, field)) == list(getattr(parsed, field))
+        assert graph_lengths(loaded) == graph_lengths(parsed)
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_snapshot_invalidated_on_change():
+    directory = copy_small()
+    try:
+        graph.load_graph(directory)
+        stars = os.path.join(directory, "stars.csv")
+        snapshot = os.path.join(directory, graph.SNAPSHOT_NAME)
+
+        # Newer modification time
+        stat = os.stat(stars)
+        os.utime(stars, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert graph.load_snapshot(
+            snapshot, graph.csv_signature(directory)) is None
+        assert graph.load_graph(directory).snapshot is None
+        assert graph.load_graph(directory).snapshot is not None
+
+        # Different size with the same modification time, a new star
+        # links Emma Watson to A Few Good Men
+        stat = os.stat(stars)
+        with open(stars, "a", encoding="utf-8") as f:
+            f.write("914612,104257\n")
+        os.utime(stars, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert graph.load_snapshot(
+            snapshot, graph.csv_signature(directory)) is None
+        reloaded = graph.load_graph(directory)
+        assert reloaded.snapshot is None
+        assert len(reloaded.shortest_path("102", "914612")) == 1
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_snapshot_corrupt():
+    directory = copy_small()
+    try:
+        expected = graph_lengths(graph.load_graph(directory, cache=False))
+        snapshot = os.path.join(directory, graph.SNAPSHOT_NAME)
+        graph.load_graph(directory)
+        with open(snapshot, "rb") as f:
+            contents = f.read()
+
+        damaged = [
+            contents[:-20],
+            contents[:len(graph.SNAPSHOT_MAGIC) + 4],
+            contents + b"extra",
+            contents[:-20] + b"x" * 20,
+            b"not a snapshot",
+            b""
+        ]
+        for data in damaged:
+            with open(snapshot, "wb") as f:
+                f.write(data)
+            loaded = graph.load_graph(directory)
+            assert loaded.snapshot is None
+            assert graph_lengths(loaded) == expected
+
+            # The damaged snapshot was replaced by a good one
+            assert graph.load_graph(directory).snapshot is not None
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_batch():
+    reset()
+    degrees.load_compact_data("small", cache=False)
+    lines = [
+        "Kevin Bacon,Tom Hanks",
+        "# comment",
+        "",
+        "102,Emma Watson",
+        "Nobody,102",
+        "not a pair"
+    ]
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        degrees.run_batch(lines)
+    answers = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert len(answers) == 4
+    assert answers[0]["degrees"] == 1
+    assert answers[0]["path"][0]["person"] == "Tom Hanks"
+    assert answers[1]["degrees"] is None
+    assert "not found" in answers[2]["error"]
+    assert "error" in answers[3]
+
+    # Several workers keep the input order
+    parallel = io.StringIO()
+    degrees.run_batch(lines, out=parallel, workers=2)
+    assert parallel.getvalue() == out.getvalue()
+
+
+def test_workers_only_with_batch():
+    with contextlib.redirect_stderr(io.StringIO()):
+        for argv in [["--workers", "2"], ["--serve", "0", "--workers", "2"]]:
+            try:
+                degrees.parse_args(argv)
+            except SystemExit:
+                pass
+            else:
+                raise AssertionError(f"accepted {argv}")
+    assert degrees.parse_args(["--batch", "-", "--workers", "2"]).workers == 2
+
+
+def test_shortest_paths_parallel():
+    for loader in degrees.LOADERS.values():
+        reset()
+        loader("small", cache=False)
+        people = sorted(degrees.names[name].copy().pop()
+                        for name in degrees.names)
+        pairs = list(itertools.product(people, repeat=2))
+        serial = [degrees.shortest_path(*pair) for pair in pairs]
+        assert degrees.shortest_paths(pairs, workers=4) == serial
+        assert degrees.shortest_paths(pairs, workers=1) == serial
+        assert degrees.shortest_paths(
+            pairs, workers=4,
+            search=degrees.shortest_path_bidirectional) == [
+            degrees.shortest_path_bidirectional(*pair) for pair in pairs]
+
+
+def test_single_source():
+    for loader in degrees.LOADERS.values():
+        reset()
+        loader("small", cache=False)
+        expected = all_lengths(degrees.shortest_path)
+        sources = {source for source, _ in expected}
+        for source in sources:
+            tree = degrees.single_source(source)
+            histogram = {}
+            for target in sources:
+                length = expected[source, target]
+                path = tree.path_to(target)
+                assert tree.distance(target) == length
+                if length is None:
+                    assert path is None
+                else:
+                    assert len(path) == length
+                    check_path(source, target, path)
+                    histogram[length] = histogram.get(length, 0) + 1
+            assert tree.histogram() == histogram
+
+
+def random_graph(people, movies, stars):
+    """
+    Returns a random CompactGraph
+    """
+    compact = graph.CompactGraph()
+    for i in range(people):
+        compact.add_person(str(i), f"Person {i}", "")
+    for i in range(movies):
+        compact.add_movie(str(i), f"Movie {i}", "")
+    star_people = graph.array(graph.INDEX_TYPE)
+    star_movies = graph.array(graph.INDEX_TYPE)
+    for _ in range(stars):
+        star_people.append(random.randrange(people))
+        star_movies.append(random.randrange(movies))
+    compact.build(star_people, star_movies)
+    return compact
+
+
+def test_landmarks_exact():
+    reset()
+    degrees.load_compact_data("small", cache=False)
+    expected = all_lengths(degrees.shortest_path)
+    for k in range(4):
+        degrees.load_landmarks("small", k, cache=False)
+        assert all_lengths(degrees.shortest_path_landmarks) == expected
+
+    random.seed(1)
+    for _ in range(30):
+        compact = random_graph(40, 15, 50)
+        index = landmarks.build_index(compact, random.randint(1, 4))
+        for source, target in itertools.product(
+                random.sample(compact.person_ids, 10), repeat=2):
+            path = index.shortest_path(source, target)
+            distance = compact.breadth_first_tree(source).distance(target)
+            if distance is None:
+                assert path is None
+            else:
+                assert len(path) == distance
+
+
+def test_landmarks_persisted():
+    directory = copy_small()
+    try:
+        compact = graph.load_graph(directory)
+        built = landmarks.landmark_index(compact, directory, 3)
+        path = os.path.join(directory, landmarks.LANDMARKS_NAME)
+        loaded = landmarks.load_index(path, compact,
+                                      graph.csv_signature(directory))
+        assert loaded.landmarks == built.landmarks
+        assert loaded.distances == built.distances
+
+        # Damaged or stale indexes are rebuilt
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 3)
+        assert landmarks.load_index(
+            path, compact, graph.csv_signature(directory)) is None
+        assert landmarks.landmark_index(
+            compact, directory, 3).distances == built.distances
+        assert landmarks.load_index(
+            path, compact, [["stale", 0, 0]]) is None
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_neighbor_cache():
+    for loader in degrees.LOADERS.values():
+        reset()
+        loader("small", cache=False)
+        expected = all_lengths(degrees.shortest_path)
+        assert all_lengths(
+            lambda s, t: degrees.shortest_path(s, t, lazy=True)) == expected
+
+        degrees.neighbor_cache.clear()
+        first = degrees.neighbors_for_person("102")
+        assert set(degrees.iter_neighbors("102")) == first
+        assert degrees.neighbors_for_person("102") is first
+        info = degrees.neighbor_cache.info()
+        assert (info["hits"], info["misses"]) == (1, 1)
+
+    cache = util.LRUCache(maxsize=2)
+    calls = []
+    for key in [1, 2, 1, 3, 2, 1]:
+        cache.get(key, lambda key: calls.append(key) or key * 10)
+    # 2 was least recently used when 3 came in, then 1 when 2 came back
+    assert calls == [1, 2, 3, 2, 1]
+    assert cache.info() == {"hits": 1, "misses": 5, "size": 2, "maxsize": 2}
+    assert cache.peek(2) == 20 and cache.peek(3) is None
+
+
+def test_filtered_ingest():
+    directory = copy_small()
+    try:
+        with open(os.path.join(directory, "stars.csv"), "a",
+                  encoding="utf-8") as f:
+            f.write("1,104257\n102,1\n")
+
+        # Both loaders report the rows with unknown ids
+        for loader in degrees.LOADERS.values():
+            reset()
+            loader(directory, cache=False)
+            skipped = degrees.load_report.skipped
+            assert skipped["stars.csv", "unknown person_id"] == 1
+            assert skipped["stars.csv", "unknown movie_id"] == 1
+            assert degrees.load_report.rows_per_second() > 0
+
+        # Movies from 1990 on with at least 4 stars:
+        # A Few Good Men, Apollo 13 and Forrest Gump
+        compact = graph.parse_graph(directory, min_year=1990, min_stars=4)
+        assert sorted(compact.movie_titles) == [
+            "A Few Good Men", "Apollo 13", "Forrest Gump"]
+        assert all(len(compact.movies_of(person)) > 0
+                   for person in range(len(compact.person_ids)))
+        skipped = compact.report.skipped
+        assert skipped["movies.csv", "year out of range"] == 2
+        assert skipped["stars.csv", "unknown movie_id"] == 1
+        # Each file counts once, though stars.csv is read three times
+        assert compact.report.rows == {
+            "movies.csv": 5, "people.csv": 16, "stars.csv": 22}
+
+        compact = graph.parse_graph(directory, max_year=1990)
+        assert sorted(compact.movie_titles) == [
+            "Rain Man", "The Princess Bride"]
+    finally:
+        shutil.rmtree(directory)
+
+
+class QuietHandler(degrees.QueryHandler):
+    def log_message(self, *args):
+        pass
+
+
+def test_server():
+    reset()
+    degrees.load_compact_data("small", cache=False)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), QuietHandler)
+    server.search = degrees.shortest_path
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        with urllib.request.urlopen(
+                url + "?source=Tom+Cruise&target=Tom+Hanks") as response:
+            answer = json.loads(response.read())
+        assert answer["degrees"] == 2
+        try:
+            urllib.request.urlopen(url + "?source=Tom+Cruise")
+        except urllib.error.HTTPError as e:
+            assert e.code == 400
+        else:
+            raise AssertionError("missing target accepted")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items())
+             if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"{test.__name__}: OK")
+    reset()
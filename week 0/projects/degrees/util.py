@@ -1,3 +1,8 @@
+import math
+import threading
+from collections import Counter, OrderedDict, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +12,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Counts of states currently in the frontier for O(1) lookups
+        self.states = Counter()
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] += 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +30,15 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard_state(node.state)
             return node
 
+    def discard_state(self, state):
+        self.states[state] -= 1
+        if self.states[state] == 0:
+            del self.states[state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +46,212 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard_state(node.state)
             return node
+
+
+def bidirectional_search(source, target, neighbors):
+    """
+    Returns the shortest list of (action, state) pairs that connect
+    source to target on an undirected graph, searching from both ends
+    at once and meeting in the middle. neighbors(state) must return
+    (action, state) pairs.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached state to (previous state, action) on the way
+    # back to the side that reached it
+    source_parents = {source: None}
+    target_parents = {target: None}
+    source_frontier = [source]
+    target_frontier = [target]
+
+    while source_frontier and target_frontier:
+
+        # Always grow the smaller frontier, the other side is
+        # likely to be far more expensive to expand
+        if len(source_frontier) <= len(target_frontier):
+            source_frontier, meeting = expand_level(
+                source_frontier, source_parents, target_parents, neighbors)
+        else:
+            target_frontier, meeting = expand_level(
+                target_frontier, target_parents, source_parents, neighbors)
+
+        if meeting is not None:
+            return join_paths(meeting, source_parents, target_parents)
+    return None
+
+
+def expand_level(frontier, parents, other_parents, neighbors):
+    """
+    Expands every state in frontier by one step.
+    Returns the next frontier and the state where this search
+    met the other one (or None if the searches did not meet).
+
+    All meetings found in a level are compared so the returned one
+    lies on a shortest path.
+    """
+    next_frontier = []
+    meeting = None
+    best_length = math.inf
+    for state in frontier:
+        for action, neighbor in neighbors(state):
+            if neighbor in parents:
+                continue
+            parents[neighbor] = (state, action)
+            next_frontier.append(neighbor)
+            if neighbor in other_parents:
+                length = (path_length(neighbor, parents)
+                          + path_length(neighbor, other_parents))
+                if length < best_length:
+                    best_length = length
+                    meeting = neighbor
+    return next_frontier, meeting
+
+
+def path_length(state, parents):
+    """
+    Returns number of steps from state back to the root of parents
+    """
+    length = 0
+    while parents[state] is not None:
+        state = parents[state][0]
+        length += 1
+    return length
+
+
+def join_paths(meeting, source_parents, target_parents):
+    """
+    Builds the (action, state) path from source to target
+    that passes through the meeting state.
+    """
+    path = []
+    state = meeting
+    while source_parents[state] is not None:
+        previous, action = source_parents[state]
+        path.append((action, state))
+        state = previous
+    path.reverse()
+
+    state = meeting
+    while target_parents[state] is not None:
+        following, action = target_parents[state]
+        path.append((action, following))
+        state = following
+    return path
+
+
+class LRUCache():
+    """
+    Keeps the values of the most recently used maxsize keys,
+    counting hits and misses. A maxsize of None never evicts.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        Returns the value for key, calling compute(key) on a miss.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+
+        value = compute(key)
+        if self.maxsize == 0:
+            return value
+        with self.lock:
+            self.entries[key] = value
+            if self.maxsize is not None and len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def peek(self, key):
+        """
+        Returns the cached value for key or None,
+        without counting or reordering anything.
+        """
+        return self.entries.get(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """
+        Returns a dictionary of hits, misses, size and maxsize.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "maxsize": self.maxsize
+        }
+
+
+class SearchTree():
+    """
+    Breadth-first search tree from a single source, holding the
+    parent and distance of every reachable state.
+    """
+
+    def __init__(self, source, parents, distances):
+        self.source = source
+        # Maps each reached state to (previous state, action),
+        # None for the source
+        self.parents = parents
+        self.distances = distances
+
+    def distance(self, target):
+        """
+        Returns number of steps from source to target,
+        None if target is unreachable.
+        """
+        return self.distances.get(target)
+
+    def path_to(self, target):
+        """
+        Returns the (action, state) path from source to target,
+        None if target is unreachable.
+        """
+        if target not in self.parents:
+            return None
+        return join_paths(target, self.parents, {target: None})
+
+    def histogram(self):
+        """
+        Returns a Counter of how many states are at each distance.
+        """
+        return Counter(self.distances.values())
+
+
+def breadth_first_tree(source, neighbors):
+    """
+    Runs breadth-first search from source until every reachable
+    state is found. neighbors(state) must return (action, state) pairs.
+    """
+    parents = {source: None}
+    distances = {source: 0}
+    frontier = deque([source])
+    while frontier:
+        state = frontier.popleft()
+        for action, neighbor in neighbors(state):
+            if neighbor not in parents:
+                parents[neighbor] = (state, action)
+                distances[neighbor] = distances[state] + 1
+                frontier.append(neighbor)
+    return SearchTree(source, parents, distances)
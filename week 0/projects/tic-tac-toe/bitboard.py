@@ -0,0 +1,318 @@
+"""
+Tic Tac Toe Player on bitboards
+
+Same functions as tictactoe.py, but a board is a pair of 9-bit masks,
+one per player, with bit 3 * i + j set for a mark in cell (i, j).
+"""
+
+import math
+import random
+import sys
+import time
+
+import tictactoe
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# Masks of the 3 rows, 3 columns and 2 diagonals
+LINES = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+]
+
+# For every mask, whether it holds a line and how many marks it has
+WINS = bytes(any(mask & line == line for line in LINES)
+             for mask in range(FULL + 1))
+MARKS = bytes(bin(mask).count("1") for mask in range(FULL + 1))
+
+# Bit of each action
+BITS = {(i, j): 1 << (3 * i + j) for i in range(3) for j in range(3)}
+
+# For each of the 8 rotations and reflections of the board,
+# the transformed mask of every mask
+SYMMETRIES = [
+    [sum(1 << target for target, source in enumerate(symmetry)
+         if mask >> source & 1)
+     for mask in range(FULL + 1)]
+    for symmetry in tictactoe.SYMMETRIES
+]
+
+# Nodes visited by searches, see tictactoe.compare()
+node_counts = tictactoe.node_counts
+
+# Positions solved by alpha-beta search, keyed by canonical_key(board),
+# holding (value, bound) with the bounds of tictactoe.py
+transpositions = {}
+
+
+class Board():
+    """
+    Immutable board of two masks. Indexing it like the nested lists
+    of tictactoe.py gives rows of X, O and EMPTY, so runner.py can
+    draw it unchanged.
+    """
+
+    __slots__ = ("x", "o")
+
+    def __init__(self, x=0, o=0):
+        self.x = x
+        self.o = o
+
+    def __getitem__(self, i):
+        return tuple(X if self.x >> (3 * i + j) & 1
+                     else O if self.o >> (3 * i + j) & 1
+                     else EMPTY
+                     for j in range(3))
+
+    def __iter__(self):
+        return (self[i] for i in range(3))
+
+    def __len__(self):
+        return 3
+
+    def __eq__(self, other):
+        return (isinstance(other, Board)
+                and self.x == other.x and self.o == other.o)
+
+    def __hash__(self):
+        return hash((self.x, self.o))
+
+    def __repr__(self):
+        return f"Board({list(self)})"
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return Board()
+
+
+def from_lists(board):
+    """
+    Returns the bitboard of a nested list board from tictactoe.py.
+    """
+    x = o = 0
+    for (i, j), bit in BITS.items():
+        if board[i][j] == X:
+            x |= bit
+        elif board[i][j] == O:
+            o |= bit
+    return Board(x, o)
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    if terminal(board):
+        return None
+    return X if MARKS[board.x] == MARKS[board.o] else O
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    if terminal(board):
+        return None
+    free = FULL & ~(board.x | board.o)
+    return {action for action, bit in BITS.items() if free & bit}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    bit = BITS.get(tuple(action))
+    if bit is None:
+        raise Exception("Invalid Action")
+    if (board.x | board.o) & bit:
+        raise Exception("Cell is not Empty")
+    if MARKS[board.x] == MARKS[board.o]:
+        return Board(board.x | bit, board.o)
+    return Board(board.x, board.o | bit)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINS[board.x]:
+        return X
+    if WINS[board.o]:
+        return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return bool(WINS[board.x] or WINS[board.o] or board.x | board.o == FULL)
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINS[board.x]:
+        return 1
+    if WINS[board.o]:
+        return -1
+    return 0
+
+
+def minimax(board):
+    """
+    Returns an optimal action for the current player on the board,
+    picked at random among all optimal actions. Actions are looked up
+    in the opening book, or searched for if there is no book.
+    Returns None if the game is over.
+    """
+    if terminal(board):
+        return None
+
+    # Imported here as the book is built with this module
+    import book
+    optimal = book.book_actions(board)
+    if optimal is None:
+        optimal = best_actions(board)
+    return random.choice(sorted(optimal))
+
+
+def best_actions(board):
+    """
+    Returns the set of all optimal actions for the current player,
+    using alpha-beta search with a transposition table.
+    """
+    maximizing = player(board) == X
+    best_value = -math.inf if maximizing else math.inf
+    best = set()
+    for action in actions(board):
+        # Same root window as tictactoe.best_actions
+        if maximizing:
+            value = alphabeta(result(board, action), best_value - 1, math.inf)
+            if value > best_value:
+                best_value, best = value, set()
+        else:
+            value = alphabeta(result(board, action), -math.inf, best_value + 1)
+            if value < best_value:
+                best_value, best = value, set()
+        if value == best_value:
+            best.add(action)
+    return best
+
+
+def alphabeta(board, alpha, beta):
+    """
+    Returns the minimax value of the board if it lies strictly between
+    alpha and beta, otherwise a bound on the value on the same side.
+    Works on the masks directly, without building Board objects.
+    """
+    return search(board.x, board.o, alpha, beta)
+
+
+def search(x, o, alpha, beta):
+    """
+    Alpha-beta search of the position with masks x and o.
+    """
+    node_counts["bitboard"] += 1
+    if WINS[x]:
+        return 1
+    if WINS[o]:
+        return -1
+    taken = x | o
+    if taken == FULL:
+        return 0
+
+    key = canonical_key(x, o)
+    entry = transpositions.get(key)
+    if entry is not None:
+        value, bound = entry
+        if bound == tictactoe.EXACT:
+            return value
+        if bound == tictactoe.LOWER and value >= beta:
+            return value
+        if bound == tictactoe.UPPER and value <= alpha:
+            return value
+
+    window = (alpha, beta)
+    free = FULL & ~taken
+    if MARKS[x] == MARKS[o]:
+        value = -math.inf
+        while free:
+            bit = free & -free
+            free ^= bit
+            value = max(value, search(x | bit, o, alpha, beta))
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+    else:
+        value = math.inf
+        while free:
+            bit = free & -free
+            free ^= bit
+            value = min(value, search(x, o | bit, alpha, beta))
+            beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+    if value <= window[0]:
+        transpositions[key] = (value, tictactoe.UPPER)
+    elif value >= window[1]:
+        transpositions[key] = (value, tictactoe.LOWER)
+    else:
+        transpositions[key] = (value, tictactoe.EXACT)
+    return value
+
+
+def canonical_key(x, o):
+    """
+    Returns the same number for a position and all its rotations and
+    reflections: the smallest of their 18-bit encodings.
+    """
+    return min(symmetry[x] << 9 | symmetry[o] for symmetry in SYMMETRIES)
+
+
+def compare():
+    """
+    Prints the nodes visited and time taken by the list and bitboard
+    alpha-beta searches on the empty board, and the time each engine
+    takes to play out every game from it.
+    """
+    print(f"{'engine':<12}{'nodes':>10}{'search':>10}{'playout':>10}")
+    engines = [("alphabeta", tictactoe),
+               ("bitboard", sys.modules[__name__])]
+    for name, engine in engines:
+        engine.transpositions.clear()
+        node_counts.clear()
+        start = time.perf_counter()
+        engine.best_actions(engine.initial_state())
+        searched = time.perf_counter() - start
+        start = time.perf_counter()
+        playout(engine, engine.initial_state())
+        played = time.perf_counter() - start
+        print(f"{name:<12}{node_counts[name]:>10}{searched:>10.4f}"
+              f"{played:>10.4f}")
+
+
+def playout(engine, board):
+    """
+    Plays every game from board with the engine's own functions,
+    returns the number of games.
+    """
+    if engine.terminal(board):
+        engine.winner(board)
+        return 1
+    return sum(playout(engine, engine.result(board, action))
+               for action in engine.actions(board))
+
+
+if __name__ == "__main__":
+    compare()
@@ -0,0 +1,136 @@
+"""
+Perfect play opening book for tic-tac-toe
+
+Solves every reachable position once, keeps one of each set of
+positions that are rotations or reflections of each other, and writes
+the optimal moves of each to a small binary table. minimax in
+tictactoe.py and bitboard.py looks moves up here before searching.
+"""
+
+import os
+import struct
+import sys
+import time
+
+import bitboard
+import tictactoe
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "tictactoe.book")
+BOOK_MAGIC = b"TTTBOOK1"
+
+# Each entry is the canonical key of a position (18 bits) shifted
+# above a 9-bit mask of its optimal moves
+MOVE_BITS = 9
+
+# Book loaded by book_actions(), False until it has been looked for
+table = False
+
+
+def positions():
+    """
+    Returns the masks (x, o) of every position reachable from the
+    empty board.
+    """
+    found = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in found:
+            continue
+        found.add((x, o))
+        board = bitboard.Board(x, o)
+        if not bitboard.terminal(board):
+            for action in bitboard.actions(board):
+                moved = bitboard.result(board, action)
+                stack.append((moved.x, moved.o))
+    return found
+
+
+def build_book():
+    """
+    Returns the book as a dict from canonical key to the mask of
+    optimal moves on the canonical position, and the number of
+    reachable positions it covers.
+    """
+    reachable = positions()
+    canonical = {bitboard.canonical_key(x, o) for x, o in reachable}
+    book = {}
+    for key in canonical:
+        board = bitboard.Board(key >> 9, key & bitboard.FULL)
+        if bitboard.terminal(board):
+            continue
+        book[key] = sum(bitboard.BITS[action]
+                        for action in bitboard.best_actions(board))
+    return book, len(reachable)
+
+
+def save_book(book, path=BOOK_PATH):
+    """Writes the book to path."""
+    entries = sorted(key << MOVE_BITS | moves for key, moves in book.items())
+    with open(path, "wb") as f:
+        f.write(BOOK_MAGIC)
+        f.write(struct.pack(f"<I{len(entries)}I", len(entries), *entries))
+
+
+def load_book(path=BOOK_PATH):
+    """
+    Reads a book written by save_book.
+    Returns None if there is no book or the file is not one.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if not data.startswith(BOOK_MAGIC):
+        return None
+    try:
+        count, = struct.unpack_from("<I", data, len(BOOK_MAGIC))
+        entries = struct.unpack_from(f"<{count}I", data, len(BOOK_MAGIC) + 4)
+    except struct.error:
+        return None
+    mask = (1 << MOVE_BITS) - 1
+    return {entry >> MOVE_BITS: entry & mask for entry in entries}
+
+
+def book_actions(board):
+    """
+    Returns the set of all optimal actions on a board of either engine,
+    looked up in the book. Returns None if there is no book or the
+    board is not in it, so the caller should search instead.
+    """
+    global table
+    if table is False:
+        table = load_book()
+    if table is None:
+        return None
+    if not isinstance(board, bitboard.Board):
+        board = bitboard.from_lists(board)
+
+    # Find the symmetry that turns the board into its canonical form,
+    # any of them if several do since the moves are then symmetric too
+    key, symmetry = min(
+        (masks[board.x] << 9 | masks[board.o], cells)
+        for masks, cells in zip(bitboard.SYMMETRIES, tictactoe.SYMMETRIES))
+    moves = table.get(key)
+    if moves is None:
+        return None
+
+    # Canonical cell k shows the board's cell symmetry[k]
+    return {divmod(symmetry[k], 3) for k in range(9) if moves >> k & 1}
+
+
+def main():
+    start = time.perf_counter()
+    book, reachable = build_book()
+    seconds = time.perf_counter() - start
+    path = sys.argv[1] if len(sys.argv) > 1 else BOOK_PATH
+    save_book(book, path)
+    print(f"Solved {reachable} positions, {len(book)} non-terminal up to "
+          f"symmetry, in {seconds:.2f}s")
+    print(f"Wrote {os.path.getsize(path)} bytes to {path}")
+
+
+if __name__ == "__main__":
+    main()
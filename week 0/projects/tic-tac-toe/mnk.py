@@ -0,0 +1,344 @@
+"""
+m,n,k-game Player
+
+Tic-tac-toe generalized to a board of m rows and n columns, won by
+k marks in a row. Boards are nested lists of X, O and EMPTY as in
+tictactoe.py. The computer searches with iterative-deepening
+alpha-beta and stops at a time budget, scoring positions it cannot
+search to the end with a heuristic.
+"""
+
+import argparse
+import math
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a won position, less the number of marks on the board so
+# that faster wins score higher. Heuristic scores stay far below it.
+WIN = 1000000
+
+# Heuristic score of an open window holding a player's marks, by count
+WINDOW_SCORES = [0, 1, 10, 100, 1000, 10000, 100000]
+
+# Nodes searched between checks of the clock
+CLOCK_INTERVAL = 1024
+
+# Bounds of transposition table values
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TimeUp(Exception):
+    """Raised inside a search when its time budget runs out."""
+
+
+class Game():
+
+    def __init__(self, rows=3, columns=3, k=3):
+        """
+        Creates an m,n,k-game on a board of rows x columns won by
+        k in a row, precomputing every window of k cells as a mask
+        with bit i * columns + j set for cell (i, j).
+        """
+        if k > max(rows, columns):
+            raise Exception("k does not fit on the board")
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.cells = rows * columns
+        self.full = (1 << self.cells) - 1
+
+        self.windows = []
+        for i in range(rows):
+            for j in range(columns):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < columns:
+                        self.windows.append(sum(
+                            1 << ((i + di * step) * columns + j + dj * step)
+                            for step in range(k)))
+
+        # Windows through each cell, to check only those after a move
+        self.windows_at = [
+            [window for window in self.windows if window >> cell & 1]
+            for cell in range(self.cells)
+        ]
+
+        # Cells ordered from the center out, central cells lie in the
+        # most windows and are usually the best moves to try first
+        center = ((rows - 1) / 2, (columns - 1) / 2)
+        self.ordered_cells = sorted(
+            range(self.cells),
+            key=lambda cell: (abs(cell // columns - center[0])
+                              + abs(cell % columns - center[1]), cell))
+
+        # Positions keyed by (mover's mask, opponent's mask), holding
+        # (depth, value, bound, best cell)
+        self.transpositions = {}
+        self.nodes = 0
+        self.deadline = None
+        self.last_search = None
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.columns for _ in range(self.rows)]
+
+    def masks(self, board):
+        """
+        Returns the masks of X's and O's marks on a board.
+        """
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    x |= 1 << (i * self.columns + j)
+                elif cell == O:
+                    o |= 1 << (i * self.columns + j)
+        return x, o
+
+    def has_line(self, mask):
+        """
+        Returns True if mask covers one of the game's windows.
+        """
+        return any(mask & window == window for window in self.windows)
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        if self.terminal(board):
+            return None
+        x, o = self.masks(board)
+        return X if x.bit_count() == o.bit_count() else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        if self.terminal(board):
+            return None
+        return {(i, j)
+                for i, row in enumerate(board)
+                for j, cell in enumerate(row) if cell is EMPTY}
+
+    def is_valid_action(self, action):
+        """
+        Returns True if action is a cell of the board, otherwise False
+        """
+        return (len(action) == 2
+                and 0 <= action[0] < self.rows
+                and 0 <= action[1] < self.columns)
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        if not self.is_valid_action(action):
+            raise Exception("Invalid Action")
+        i, j = action
+        if board[i][j] is not EMPTY:
+            raise Exception("Cell is not Empty")
+        new_board = [list(row) for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = self.masks(board)
+        if self.has_line(x):
+            return X
+        if self.has_line(o):
+            return O
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x, o = self.masks(board)
+        return (x | o == self.full
+                or self.has_line(x) or self.has_line(o))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1, None: 0}[self.winner(board)]
+
+    def minimax(self, board, time_budget=1.0, max_depth=None):
+        """
+        Returns the best action found for the current player within
+        time_budget seconds, searching at most max_depth moves ahead.
+        Returns None if the game is over.
+        """
+        if self.terminal(board):
+            return None
+        x, o = self.masks(board)
+        if x.bit_count() == o.bit_count():
+            me, them = x, o
+        else:
+            me, them = o, x
+        cell = self.search(me, them, time_budget, max_depth)
+        return divmod(cell, self.columns)
+
+    def search(self, me, them, time_budget=1.0, max_depth=None):
+        """
+        Iterative-deepening alpha-beta search of the position where
+        the player to move has marks me and the opponent them.
+        Searches one move deeper each round until the game is solved,
+        max_depth is reached or time_budget runs out, and returns the
+        best cell of the deepest round that finished. Details of the
+        search are left in self.last_search.
+        """
+        started = time.perf_counter()
+        self.nodes = 0
+        empty = self.cells - (me | them).bit_count()
+        if max_depth is None or max_depth > empty:
+            max_depth = empty
+
+        # The first round always finishes, so there is a move to return
+        self.deadline = None
+        best_cell, value, depth = None, 0, 0
+        for round_depth in range(1, max_depth + 1):
+            try:
+                value, cell = self.negamax(me, them, round_depth,
+                                           -math.inf, math.inf, None)
+            except TimeUp:
+                break
+            best_cell, depth = cell, round_depth
+
+            # A forced win or loss is found, deeper rounds would not
+            # change the outcome
+            if abs(value) > WIN // 2:
+                break
+            self.deadline = started + time_budget
+            if time.perf_counter() > self.deadline:
+                break
+
+        self.deadline = None
+        self.last_search = {
+            "depth": depth,
+            "nodes": self.nodes,
+            "value": value,
+            "seconds": time.perf_counter() - started,
+            "solved": depth == empty or abs(value) > WIN // 2
+        }
+        return best_cell
+
+    def negamax(self, me, them, depth, alpha, beta, last):
+        """
+        Returns (value, best cell) of the position for the player to
+        move, where value is exact when strictly between alpha and
+        beta and a bound on the same side otherwise. last is the cell
+        the opponent just played, the only place a new line can be.
+        """
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and self.deadline is not None \
+                and time.perf_counter() > self.deadline:
+            raise TimeUp
+
+        taken = me | them
+        if last is not None and any(them & window == window
+                                    for window in self.windows_at[last]):
+            return -(WIN - taken.bit_count()), None
+        if taken == self.full:
+            return 0, None
+        if depth == 0:
+            return self.evaluate(me, them), None
+
+        key = (me, them)
+        entry = self.transpositions.get(key)
+        first = None
+        if entry is not None:
+            entry_depth, value, bound, first = entry
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return value, first
+                if bound == LOWER and value >= beta:
+                    return value, first
+                if bound == UPPER and value <= alpha:
+                    return value, first
+
+        # Try the best cell of an earlier search first, then the
+        # free cells from the center out
+        moves = [cell for cell in self.ordered_cells if not taken >> cell & 1]
+        if first is not None and not taken >> first & 1:
+            moves.remove(first)
+            moves.insert(0, first)
+
+        window = (alpha, beta)
+        best_value, best_cell = -math.inf, None
+        for cell in moves:
+            value, _ = self.negamax(them, me | 1 << cell, depth - 1,
+                                    -beta, -alpha, cell)
+            value = -value
+            if value > best_value:
+                best_value, best_cell = value, cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= window[0]:
+            bound = UPPER
+        elif best_value >= window[1]:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.transpositions[key] = (depth, best_value, bound, best_cell)
+        return best_value, best_cell
+
+    def evaluate(self, me, them):
+        """
+        Heuristic value of a position for the player to move: windows
+        only one player has marks in could still become that player's
+        line, and count for them by how full they are.
+        """
+        score = 0
+        for window in self.windows:
+            mine = me & window
+            theirs = them & window
+            if mine and not theirs:
+                score += WINDOW_SCORES[min(mine.bit_count(), 6)]
+            elif theirs and not mine:
+                score -= WINDOW_SCORES[min(theirs.bit_count(), 6)]
+        return score
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Let the computer play an m,n,k-game against itself.")
+    parser.add_argument("--rows", type=int, default=4)
+    parser.add_argument("--columns", type=int, default=4)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="seconds per move")
+    parser.add_argument("--depth", type=int, default=None,
+                        help="deepest search in moves")
+    args = parser.parse_args()
+
+    game = Game(args.rows, args.columns, args.k)
+    board = game.initial_state()
+    while not game.terminal(board):
+        turn = game.player(board)
+        action = game.minimax(board, args.budget, args.depth)
+        board = game.result(board, action)
+        search = game.last_search
+        print(f"{turn} plays {action}: depth {search['depth']}, "
+              f"{search['nodes']} nodes, {search['seconds']:.3f}s, "
+              f"value {search['value']}")
+    for row in board:
+        print(" ".join(cell or "." for cell in row))
+    winner = game.winner(board)
+    print("Tie." if winner is None else f"{winner} wins.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Root-split parallel search for tic-tac-toe and other m,n,k-games
+
+Each round of the iterative deepening in mnk.Game.search is split at
+the root: every root move is searched to the round's depth by a worker
+process, and workers share what they find through a small transposition
+table and the best root value so far in shared memory. The chosen move
+is the one the serial search picks with an empty transposition table.
+"""
+
+import argparse
+import ctypes
+import math
+import multiprocessing
+import os
+import time
+
+import mnk
+
+# Entries in the shared transposition table, colliding positions
+# replace each other
+TABLE_SIZE = 1 << 16
+
+# Boards compared by main() as (rows, columns, k, depth)
+BOARDS = [
+    (3, 3, 3, 9),
+    (4, 4, 4, 7),
+    (5, 5, 4, 6),
+    (6, 6, 4, 5),
+    (7, 7, 5, 5)
+]
+
+# Stands for no value in the shared best root value
+NO_VALUE = -(1 << 62)
+
+# Game of this worker process and the shared best root value,
+# see start_worker()
+worker_game = None
+worker_best = None
+
+
+class SharedTable():
+    """
+    Fixed-size transposition table in shared memory that can replace
+    the dict of mnk.Game.transpositions. Each entry is three 64-bit
+    slots: both masks of the position xor the packed entry, then the
+    packed entry. Entries are written without locks, so a read that
+    sees half of a write fails the masks check and finds nothing.
+    """
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.size = len(slots) // 3
+
+    @classmethod
+    def create(cls, context, size=TABLE_SIZE):
+        """Returns an empty table in memory shared with child processes."""
+        return cls(context.RawArray("q", 3 * size))
+
+    def get(self, key):
+        me, them = key
+        index = 3 * (hash(key) % self.size)
+        data = self.slots[index + 2]
+        if not data or self.slots[index] ^ data != me \
+                or self.slots[index + 1] ^ data != them:
+            return None
+
+        # Packed as value (offset to be positive), depth, bound + 1
+        # and best cell + 1, zero for an empty slot
+        value = (data >> 32) - (1 << 30)
+        depth = data >> 16 & 0xffff
+        bound = (data >> 8 & 0xff) - 1
+        cell = (data & 0xff) - 1
+        return depth, value, bound, None if cell < 0 else cell
+
+    def __setitem__(self, key, entry):
+        me, them = key
+        depth, value, bound, cell = entry
+        if abs(value) >= 1 << 30:
+            return
+        data = ((value + (1 << 30)) << 32 | depth << 16 | (bound + 1) << 8
+                | (0 if cell is None else cell + 1))
+        index = 3 * (hash(key) % self.size)
+        self.slots[index] = me ^ data
+        self.slots[index + 1] = them ^ data
+        self.slots[index + 2] = data
+
+    def clear(self):
+        ctypes.memset(self.slots, 0, ctypes.sizeof(self.slots))
+
+
+def start_worker(rows, columns, k, slots, best):
+    """
+    Pool initializer, creates this worker's game on the shared table
+    and keeps the shared best root value.
+    """
+    global worker_game, worker_best
+    worker_game = mnk.Game(rows, columns, k)
+    worker_game.transpositions = SharedTable(slots)
+    worker_best = best
+
+
+def search_move(me, them, cell, depth):
+    """
+    Returns (cell, value, nodes) of playing cell in the position with
+    masks me and them, searched depth moves deep in the worker's game.
+
+    Values are integers, so searching above the best root value less
+    one gives the exact value of any move at least as good as the best
+    so far, and only a bound below it for the others. The shared best
+    is updated without a lock: a lost update only prunes less.
+    """
+    best = worker_best.value
+    alpha = -math.inf if best == NO_VALUE else best - 1
+    worker_game.nodes = 0
+    value, _ = worker_game.negamax(them, me | 1 << cell, depth - 1,
+                                   -math.inf, -alpha, cell)
+    value = -value
+    if value > worker_best.value:
+        worker_best.value = value
+    return cell, value, worker_game.nodes
+
+
+def call_with(task):
+    """Calls search_move with a tuple of arguments."""
+    return search_move(*task)
+
+
+class ParallelGame():
+    """
+    Searches an m,n,k-game with a pool of worker processes. Use it as
+    a context manager, or call close() when done.
+    """
+
+    def __init__(self, rows=3, columns=3, k=3, workers=None):
+        self.game = mnk.Game(rows, columns, k)
+        self.workers = workers or os.cpu_count() or 1
+        context = multiprocessing.get_context(
+            "fork" if "fork" in multiprocessing.get_all_start_methods()
+            else "spawn")
+        self.table = SharedTable.create(context)
+        self.best = context.RawValue("q", NO_VALUE)
+        self.pool = context.Pool(
+            self.workers, start_worker,
+            (rows, columns, k, self.table.slots, self.best))
+        self.last_search = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def minimax(self, board, max_depth=None):
+        """
+        Returns the best action for the current player, searching at
+        most max_depth moves ahead, or None if the game is over.
+        """
+        game = self.game
+        if game.terminal(board):
+            return None
+        x, o = game.masks(board)
+        if x.bit_count() == o.bit_count():
+            me, them = x, o
+        else:
+            me, them = o, x
+        return divmod(self.search(me, them, max_depth), game.columns)
+
+    def search(self, me, them, max_depth=None):
+        """
+        Iterative-deepening search with each round split at the root,
+        returning the same cell as mnk.Game.search without a time
+        budget. Every root move at least as good as the best gets its
+        exact value, and the first of the best, in the serial search's
+        move order, is chosen.
+        """
+        game = self.game
+        started = time.perf_counter()
+        self.table.clear()
+        taken = me | them
+        empty = game.cells - taken.bit_count()
+        if max_depth is None or max_depth > empty:
+            max_depth = empty
+
+        moves = [cell for cell in game.ordered_cells if not taken >> cell & 1]
+        best_cell, best_value, depth, nodes = None, 0, 0, 0
+        for depth in range(1, max_depth + 1):
+            # The serial search tries the previous round's best first
+            if best_cell is not None:
+                moves.remove(best_cell)
+                moves.insert(0, best_cell)
+            self.best.value = NO_VALUE
+            values = {}
+            for cell, value, searched in self.pool.imap_unordered(
+                    call_with, [(me, them, cell, depth) for cell in moves]):
+                values[cell] = value
+                nodes += searched + 1
+            best_value = max(values.values())
+            best_cell = next(cell for cell in moves
+                             if values[cell] == best_value)
+            if abs(best_value) > mnk.WIN // 2:
+                break
+
+        self.last_search = {
+            "depth": depth,
+            "nodes": nodes,
+            "value": best_value,
+            "seconds": time.perf_counter() - started
+        }
+        return best_cell
+
+
+def compare(boards, workers=None):
+    """
+    Prints the time serial and root-split search take from the empty
+    board of each (rows, columns, k, depth), and checks they agree.
+    """
+    print(f"{'board':<12}{'depth':>6}{'serial':>10}{'parallel':>10}"
+          f"{'speedup':>9}{'nodes':>10}{'nodes':>10}")
+    for rows, columns, k, depth in boards:
+        game = mnk.Game(rows, columns, k)
+        serial_cell = game.search(0, 0, math.inf, depth)
+        serial = game.last_search
+        with ParallelGame(rows, columns, k, workers) as parallel:
+            parallel_cell = parallel.search(0, 0, depth)
+            result = parallel.last_search
+        if parallel_cell != serial_cell:
+            raise Exception(f"searches disagree on {rows}x{columns} k={k}")
+        print(f"{f'{rows}x{columns} k={k}':<12}{serial['depth']:>6}"
+              f"{serial['seconds']:>10.3f}{result['seconds']:>10.3f}"
+              f"{serial['seconds'] / result['seconds']:>8.2f}x"
+              f"{serial['nodes']:>10}{result['nodes']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare serial and root-split parallel search.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all CPUs)")
+    args = parser.parse_args()
+    print(f"{args.workers or os.cpu_count()} workers")
+    compare(BOARDS, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,19 @@
+import argparse
+import importlib
 import pygame
 import sys
 import time
 
-import tictactoe as ttt
+# Engines the computer can play with and the modules implementing them
+ENGINES = {
+    "lists": "tictactoe",
+    "bitboard": "bitboard"
+}
+
+parser = argparse.ArgumentParser(description="Play tic-tac-toe.")
+parser.add_argument("--engine", choices=list(ENGINES), default="lists")
+args = parser.parse_args()
+ttt = importlib.import_module(ENGINES[args.engine])
 
 pygame.init()
 size = width, height = 600, 400
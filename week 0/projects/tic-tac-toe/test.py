@@ -1,4 +1,15 @@
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+
+import bitboard
+import book
+import mnk
+import parallel
 import tictactoe as ttt
+import tournament
 EMPTY = None
 X = "X"
 O = "O"
@@ -34,4 +45,247 @@ winner = ttt.winner(test)
 
 # print(winner)
 
-print(ttt.minimax(board))
\ No newline at end of file
+
+def key(board):
+    return tuple(tuple(row) for row in board)
+
+
+def positions():
+    """
+    Returns every board reachable from the initial state
+    """
+    found = {}
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        if key(board) in found:
+            continue
+        found[key(board)] = board
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                stack.append(ttt.result(board, action))
+    return list(found.values())
+
+
+def value(board, memo={}):
+    """
+    Returns the minimax value of board, searched independently of
+    tictactoe.py with a plain memo
+    """
+    if key(board) not in memo:
+        if ttt.terminal(board):
+            memo[key(board)] = ttt.utility(board)
+        else:
+            values = [value(ttt.result(board, action))
+                      for action in ttt.actions(board)]
+            memo[key(board)] = (max if ttt.player(board) == X else min)(values)
+    return memo[key(board)]
+
+
+def optimal(board):
+    """
+    Returns the set of actions keeping the value of board
+    """
+    return {action for action in ttt.actions(board)
+            if value(ttt.result(board, action)) == value(board)}
+
+
+def test_positions():
+    assert len(positions()) == 5478
+
+
+def test_best_actions():
+    ttt.transpositions.clear()
+    for board in positions():
+        if not ttt.terminal(board):
+            assert ttt.best_actions(board) == optimal(board)
+            assert ttt.minimax(board) in optimal(board)
+        else:
+            assert ttt.minimax(board) is None
+
+
+def test_best_actions_exhaustive():
+    for moves in [[], [(1, 1)], [(0, 0), (1, 1)], [(0, 0), (2, 1), (2, 2)]]:
+        board = ttt.initial_state()
+        for action in moves:
+            board = ttt.result(board, action)
+        assert ttt.best_actions_exhaustive(board) == optimal(board)
+        ttt.transpositions.clear()
+        assert ttt.best_actions(board) == optimal(board)
+
+
+def test_canonical_key():
+    board = ttt.result(ttt.result(ttt.initial_state(), (0, 1)), (2, 2))
+    turned = ttt.result(ttt.result(ttt.initial_state(), (1, 2)), (2, 0))
+    assert ttt.canonical_key(board) == ttt.canonical_key(turned)
+    assert ttt.canonical_key(board) != ttt.canonical_key(
+        ttt.result(ttt.result(ttt.initial_state(), (0, 1)), (2, 1)))
+
+
+def test_bitboard():
+    bitboard.transpositions.clear()
+    for board in positions():
+        bits = bitboard.from_lists(board)
+        assert [list(row) for row in bits] == board
+        assert bitboard.player(bits) == ttt.player(board)
+        assert bitboard.actions(bits) == ttt.actions(board)
+        assert bitboard.winner(bits) == ttt.winner(board)
+        assert bitboard.terminal(bits) == ttt.terminal(board)
+        assert bitboard.utility(bits) == ttt.utility(board)
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                assert bitboard.result(bits, action) == bitboard.from_lists(
+                    ttt.result(board, action))
+            assert bitboard.best_actions(bits) == optimal(board)
+    try:
+        bitboard.result(bitboard.result(bitboard.initial_state(), (1, 1)),
+                        (1, 1))
+    except Exception as e:
+        assert str(e) == "Cell is not Empty"
+    else:
+        raise AssertionError("move on a taken cell accepted")
+
+
+def test_book():
+    assert book.load_book() is not None
+    for board in positions():
+        if ttt.terminal(board):
+            continue
+        assert book.book_actions(board) == optimal(board)
+        assert book.book_actions(bitboard.from_lists(board)) == optimal(board)
+
+
+def test_book_file():
+    table, reachable = book.build_book()
+    assert reachable == 5478
+    assert table == book.load_book()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tictactoe.book")
+        book.save_book(table, path)
+        assert book.load_book(path) == table
+        with open(path, "r+b") as f:
+            f.truncate(20)
+        assert book.load_book(path) is None
+        with open(path, "wb") as f:
+            f.write(b"not a book")
+        assert book.load_book(path) is None
+        assert book.load_book(os.path.join(directory, "missing")) is None
+
+
+def test_mnk_rules():
+    game = mnk.Game(3, 3, 3)
+    for board in positions():
+        assert game.player(board) == ttt.player(board)
+        assert game.actions(board) == ttt.actions(board)
+        assert game.winner(board) == ttt.winner(board)
+        assert game.terminal(board) == ttt.terminal(board)
+        assert game.utility(board) == ttt.utility(board)
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                assert game.result(board, action) == ttt.result(board, action)
+    game = mnk.Game(4, 5, 4)
+    board = game.initial_state()
+    for action in [(0, 1), (3, 4), (1, 2), (3, 3), (2, 3), (0, 0)]:
+        assert not game.terminal(board)
+        board = game.result(board, action)
+    assert game.winner(board) is None
+    for action in [(1, 0), (3, 2), (2, 0), (3, 1)]:
+        board = game.result(board, action)
+    assert game.winner(board) == O
+    assert game.utility(board) == -1
+    assert not game.is_valid_action((4, 0))
+    assert game.is_valid_action((3, 4))
+
+
+def test_mnk_minimax():
+    game = mnk.Game(3, 3, 3)
+    for board in positions():
+        if ttt.terminal(board):
+            assert game.minimax(board) is None
+        else:
+            assert game.minimax(board, time_budget=10) in optimal(board)
+            assert game.last_search["solved"]
+
+
+def test_mnk_diagonal():
+    game = mnk.Game(4, 5, 4)
+    board = game.initial_state()
+    for action in [(0, 1), (0, 0), (1, 2), (1, 0), (2, 3), (2, 0)]:
+        board = game.result(board, action)
+    # X playing (3, 4) completes the diagonal
+    assert game.minimax(board, time_budget=10) == (3, 4)
+    assert game.winner(game.result(board, (3, 4))) == X
+
+    board = game.initial_state()
+    for action in [(0, 1), (0, 0), (1, 2), (1, 0), (2, 3)]:
+        board = game.result(board, action)
+    # O must block (3, 4) or lose to it
+    assert game.minimax(board, time_budget=10) == (3, 4)
+
+
+def test_mnk_time_budget():
+    game = mnk.Game(7, 7, 5)
+    board = game.initial_state()
+    for _ in range(4):
+        start = time.perf_counter()
+        action = game.minimax(board, time_budget=0.2)
+        assert time.perf_counter() - start < 1
+        assert action in game.actions(board)
+        assert not game.last_search["solved"]
+        board = game.result(board, action)
+
+
+def test_shared_table():
+    table = parallel.SharedTable.create(multiprocessing.get_context(), 64)
+    assert table.get((5, 6)) is None
+    table[5, 6] = (3, -999990, ttt.UPPER, 7)
+    table[0, 0] = (1, 12, ttt.EXACT, None)
+    assert table.get((5, 6)) == (3, -999990, ttt.UPPER, 7)
+    assert table.get((0, 0)) == (1, 12, ttt.EXACT, None)
+    assert table.get((6, 5)) is None
+    table.clear()
+    assert table.get((5, 6)) is None
+
+
+def test_parallel_matches_serial():
+    for rows, columns, k, depth, moves in [
+            (3, 3, 3, 9, []),
+            (3, 3, 3, 9, [(0, 0)]),
+            (3, 3, 3, 9, [(1, 1), (0, 1)]),
+            (4, 4, 3, 5, []),
+            (4, 4, 4, 4, [(1, 1), (2, 2), (0, 0)]),
+            (5, 5, 4, 3, [(2, 2)])]:
+        with parallel.ParallelGame(rows, columns, k, workers=2) as search:
+            board = search.game.initial_state()
+            for action in moves:
+                board = search.game.result(board, action)
+            game = mnk.Game(rows, columns, k)
+            assert (search.minimax(board, depth)
+                    == game.minimax(board, math.inf, depth))
+            assert search.last_search["value"] == game.last_search["value"]
+
+
+def test_tournament():
+    matchups = [("book", "mnk"), ("bitboard", "alphabeta"),
+                ("random", "book"), ("mnk", "random")]
+    report = tournament.tournament(matchups, 30, workers=2, batch=10)
+    assert tournament.losses(report) == []
+    assert report["matchups"]["book vs mnk"]["tie"] == 30
+    assert report["matchups"]["bitboard vs alphabeta"]["tie"] == 30
+    for counts in report["matchups"].values():
+        assert sum(counts.values()) == 30
+    stats = report["players"]["book"]
+    assert 0 < stats["p50_ms"] <= stats["p90_ms"] <= stats["p99_ms"]
+    assert report["players"]["mnk"]["nodes_per_move"] > 0
+    assert tournament.losses({"matchups": {
+        "random vs book": {"X": 1, "O": 0, "tie": 0}}}) == ["random vs book"]
+
+
+if __name__ == "__main__":
+    print(ttt.minimax(board))
+
+    tests = [value for name, value in list(globals().items())
+             if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"{test.__name__}: OK")
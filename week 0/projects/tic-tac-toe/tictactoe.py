@@ -4,11 +4,39 @@ Tic Tac Toe Player
 
 import math
 import random
+import time
+from collections import Counter
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Nodes visited by each search, see compare()
+node_counts = Counter()
+
+# Positions solved by alpha-beta search, keyed by canonical_key(board),
+# holding (value, bound) where bound is one of:
+EXACT = 0
+LOWER = 1
+UPPER = 2
+transpositions = {}
+
+# The 8 rotations and reflections of the board, each as the flat
+# cell index (3 * i + j) read for every cell of the transformed board
+SYMMETRIES = [
+    tuple(3 * i + j for i, j in cells)
+    for cells in [
+        [(i, j) for i in range(3) for j in range(3)],
+        [(2 - j, i) for i in range(3) for j in range(3)],
+        [(2 - i, 2 - j) for i in range(3) for j in range(3)],
+        [(j, 2 - i) for i in range(3) for j in range(3)],
+        [(i, 2 - j) for i in range(3) for j in range(3)],
+        [(2 - i, j) for i in range(3) for j in range(3)],
+        [(j, i) for i in range(3) for j in range(3)],
+        [(2 - j, 2 - i) for i in range(3) for j in range(3)]
+    ]
+]
+
 
 def initial_state():
     """
@@ -180,6 +208,7 @@ def maxval(board):
     Max-val recursive branch of minimax algoritm
     Maximizing player will find best options from this function
     """
+    node_counts["minimax"] += 1
     v = -math.inf
     if terminal(board):
         return utility(board)
@@ -193,6 +222,7 @@ def minval(board):
     Min-val recursive branch of minimax algoritm
     Minimizing player will find best options from this function
     """
+    node_counts["minimax"] += 1
     v = math.inf
     if terminal(board):
         return utility(board)
@@ -203,11 +233,53 @@ def minval(board):
 
 def minimax(board):
     """
-    algorithm used to predict next best movie for
-    maximizing or minimizing player
+    Returns an optimal action for the current player on the board,
+    picked at random among all optimal actions. Actions are looked up
+    in the opening book, or searched for if there is no book.
+    Returns None if the game is over.
+    """
+    if terminal(board):
+        return None
+
+    # Imported here as the book is built with this module
+    import book
+    optimal = book.book_actions(board)
+    if optimal is None:
+        optimal = best_actions(board)
+    return random.choice(sorted(optimal))
+
+
+def best_actions(board):
+    """
+    Returns the set of all optimal actions for the current player,
+    using alpha-beta search with a transposition table.
+    """
+    maximizing = player(board) == X
+    best_value = -math.inf if maximizing else math.inf
+    best = set()
+    for action in actions(board):
+        # Values are -1, 0 or 1, so a window just wider than the best
+        # value so far returns the exact value of every action at least
+        # as good, and prunes the rest
+        if maximizing:
+            value = alphabeta(result(board, action), best_value - 1, math.inf)
+            if value > best_value:
+                best_value, best = value, set()
+        else:
+            value = alphabeta(result(board, action), -math.inf, best_value + 1)
+            if value < best_value:
+                best_value, best = value, set()
+        if value == best_value:
+            best.add(action)
+    return best
+
+
+def best_actions_exhaustive(board):
+    """
+    Returns the set of all optimal actions for the current player,
+    evaluating every action with a full minimax search.
     """
 
-    best_option = None
     if player(board) == X:
         # if this is player X (maximizing)
         # find all possible actions for current state and
@@ -233,10 +305,93 @@ def minimax(board):
             if best_option > action[1]:
                 best_option = action[1]
 
-    # randomly pick an action within the set of actions
-    # with the most desirable score
-    possible_actions = list(
-        filter(
-            lambda action: action[1] == best_option,
-            possible_actions))
-    return random.choice(possible_actions)[0]
+    # keep the actions with the most desirable score
+    return {action for action, value in possible_actions
+            if value == best_option}
+
+
+def alphabeta(board, alpha, beta):
+    """
+    Returns the minimax value of the board if it lies strictly between
+    alpha and beta, otherwise a bound on the value on the same side.
+    Values are stored in the transposition table under the board's
+    canonical key, so each position is searched once for all its
+    rotations and reflections.
+    """
+    node_counts["alphabeta"] += 1
+    key = canonical_key(board)
+    entry = transpositions.get(key)
+    if entry is not None:
+        value, bound = entry
+        if bound == EXACT:
+            return value
+        if bound == LOWER and value >= beta:
+            return value
+        if bound == UPPER and value <= alpha:
+            return value
+
+    if terminal(board):
+        value = utility(board)
+        transpositions[key] = (value, EXACT)
+        return value
+
+    window = (alpha, beta)
+    if player(board) == X:
+        value = -math.inf
+        for action in actions(board):
+            value = max(value, alphabeta(result(board, action), alpha, beta))
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+    else:
+        value = math.inf
+        for action in actions(board):
+            value = min(value, alphabeta(result(board, action), alpha, beta))
+            beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+    if value <= window[0]:
+        transpositions[key] = (value, UPPER)
+    elif value >= window[1]:
+        transpositions[key] = (value, LOWER)
+    else:
+        transpositions[key] = (value, EXACT)
+    return value
+
+
+def canonical_key(board):
+    """
+    Returns the same string for a board and all its rotations and
+    reflections: the smallest of their 9-character encodings.
+    """
+    cells = [cell or "." for row in board for cell in row]
+    return min("".join(cells[i] for i in symmetry) for symmetry in SYMMETRIES)
+
+
+def compare(board=None):
+    """
+    Prints the nodes visited and time taken by exhaustive minimax and
+    by alpha-beta with an empty transposition table to find the
+    optimal actions on the board, the empty board by default.
+    """
+    if board is None:
+        board = initial_state()
+    searches = [("minimax", best_actions_exhaustive),
+                ("alphabeta", best_actions)]
+    found = []
+    print(f"{'search':<12}{'nodes':>10}{'seconds':>10}")
+    for name, search in searches:
+        transpositions.clear()
+        node_counts.clear()
+        start = time.perf_counter()
+        found.append(search(board))
+        seconds = time.perf_counter() - start
+        print(f"{name:<12}{node_counts[name]:>10}{seconds:>10.4f}")
+    print("Optimal actions:", sorted(found[-1]))
+    if found[0] != found[1]:
+        raise Exception("searches disagree on the optimal actions")
+
+
+if __name__ == "__main__":
+    compare()
@@ -0,0 +1,212 @@
+"""
+Headless tic-tac-toe tournament
+
+Plays many games between the computer players in worker processes,
+recording who won, how long each move took and how many nodes each
+search visited. Perfect players must never lose.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+
+import bitboard
+import mnk
+import tictactoe as ttt
+
+# Game of the m,n,k player, kept between moves for its transposition table
+mnk_game = mnk.Game(3, 3, 3)
+
+
+def book_move(board):
+    """Opening book move, searching if there is no book."""
+    return ttt.minimax(board)
+
+
+def alphabeta_move(board):
+    """Alpha-beta search with the list engine."""
+    return random.choice(sorted(ttt.best_actions(board)))
+
+
+def bitboard_move(board):
+    """Alpha-beta search with the bitboard engine."""
+    return random.choice(sorted(
+        bitboard.best_actions(bitboard.from_lists(board))))
+
+
+def mnk_move(board):
+    """Iterative-deepening search of the m,n,k engine."""
+    return mnk_game.minimax(board)
+
+
+def random_move(board):
+    """Any free cell."""
+    return random.choice(sorted(ttt.actions(board)))
+
+
+# Players and the functions choosing their moves
+PLAYERS = {
+    "book": book_move,
+    "alphabeta": alphabeta_move,
+    "bitboard": bitboard_move,
+    "mnk": mnk_move,
+    "random": random_move
+}
+
+# Players that always play a move keeping the game's value
+PERFECT = {"book", "alphabeta", "bitboard", "mnk"}
+
+
+def play_games(x_name, o_name, games, seed):
+    """
+    Plays games between x_name as X and o_name as O.
+    Returns counts of the winners (None for a tie) and, per player,
+    the latency in seconds and the nodes searched of every move.
+    """
+    random.seed(seed)
+    players = {ttt.X: (x_name, PLAYERS[x_name]),
+               ttt.O: (o_name, PLAYERS[o_name])}
+    outcomes = {ttt.X: 0, ttt.O: 0, None: 0}
+    latencies = {x_name: [], o_name: []}
+    nodes = {x_name: [], o_name: []}
+    for _ in range(games):
+        board = ttt.initial_state()
+        while not ttt.terminal(board):
+            name, move = players[ttt.player(board)]
+            # The m,n,k engine counts its nodes per search
+            before = sum(ttt.node_counts.values())
+            mnk_game.nodes = 0
+            start = time.perf_counter()
+            action = move(board)
+            latencies[name].append(time.perf_counter() - start)
+            nodes[name].append(sum(ttt.node_counts.values()) - before
+                               + mnk_game.nodes)
+            board = ttt.result(board, action)
+        outcomes[ttt.winner(board)] += 1
+    return x_name, o_name, outcomes, latencies, nodes
+
+
+def call_with(task):
+    """Calls play_games with a tuple of arguments."""
+    return play_games(*task)
+
+
+def percentile(values, fraction):
+    """Returns the nearest-rank percentile of sorted values."""
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def tournament(matchups, games, workers=None, seed=0, batch=50):
+    """
+    Plays games of each (x player, o player) matchup across workers
+    processes (all CPUs if None), in batches of batch games.
+    Returns a report with the outcomes of every matchup and the move
+    latency percentiles and nodes of every player.
+    """
+    tasks = []
+    for x_name, o_name in matchups:
+        for start in range(0, games, batch):
+            tasks.append((x_name, o_name, min(batch, games - start),
+                          seed + len(tasks)))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            results = pool.map(call_with, tasks, chunksize=1)
+    else:
+        results = map(call_with, tasks)
+
+    outcomes = {}
+    latencies = {}
+    nodes = {}
+    for x_name, o_name, counts, times, searched in results:
+        total = outcomes.setdefault(f"{x_name} vs {o_name}",
+                                    {"X": 0, "O": 0, "tie": 0})
+        total["X"] += counts[ttt.X]
+        total["O"] += counts[ttt.O]
+        total["tie"] += counts[None]
+        for name in times:
+            latencies.setdefault(name, []).extend(times[name])
+            nodes.setdefault(name, []).extend(searched[name])
+
+    players = {}
+    for name, times in latencies.items():
+        times.sort()
+        players[name] = {
+            "moves": len(times),
+            "p50_ms": 1000 * percentile(times, 0.5),
+            "p90_ms": 1000 * percentile(times, 0.9),
+            "p99_ms": 1000 * percentile(times, 0.99),
+            "max_ms": 1000 * times[-1],
+            "nodes_per_move": sum(nodes[name]) / len(times)
+        }
+    return {"games": games, "matchups": outcomes, "players": players}
+
+
+def losses(report):
+    """
+    Returns the matchups where a perfect player lost a game.
+    """
+    lost = []
+    for matchup, counts in report["matchups"].items():
+        x_name, o_name = matchup.split(" vs ")
+        if (x_name in PERFECT and counts["O"]) or \
+                (o_name in PERFECT and counts["X"]):
+            lost.append(matchup)
+    return lost
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play computer players against each other.")
+    parser.add_argument("--players", nargs="+", choices=list(PLAYERS),
+                        default=list(PLAYERS))
+    parser.add_argument("--games", type=int, default=200,
+                        help="games per matchup")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all CPUs)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file to write the report to")
+    args = parser.parse_args()
+
+    # Every pairing both ways round, except random against itself
+    matchups = [(x_name, o_name)
+                for x_name, o_name in itertools.product(args.players, repeat=2)
+                if x_name in PERFECT or o_name in PERFECT]
+
+    start = time.perf_counter()
+    report = tournament(matchups, args.games, args.workers, args.seed)
+    seconds = time.perf_counter() - start
+
+    print(f"{'matchup':<24}{'X wins':>8}{'O wins':>8}{'ties':>8}")
+    for matchup, counts in report["matchups"].items():
+        print(f"{matchup:<24}{counts['X']:>8}{counts['O']:>8}"
+              f"{counts['tie']:>8}")
+    print()
+    print(f"{'player':<12}{'moves':>8}{'p50 ms':>9}{'p90 ms':>9}"
+          f"{'p99 ms':>9}{'max ms':>9}{'nodes':>9}")
+    for name, stats in report["players"].items():
+        print(f"{name:<12}{stats['moves']:>8}{stats['p50_ms']:>9.3f}"
+              f"{stats['p90_ms']:>9.3f}{stats['p99_ms']:>9.3f}"
+              f"{stats['max_ms']:>9.3f}{stats['nodes_per_move']:>9.1f}")
+    games = args.games * len(matchups)
+    print(f"\n{games} games in {seconds:.2f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    lost = losses(report)
+    if lost:
+        raise AssertionError(f"perfect play lost in {', '.join(lost)}")
+
+
+if __name__ == "__main__":
+    main()
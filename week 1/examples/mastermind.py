@@ -6,7 +6,7 @@ for i in range(4):
     for color in colors:
         symbols.append(Symbol(f"{color}{i}"))
 
-knowledge = And()
+knowledge = KnowledgeBase()
 
 # Each color has a position.
 for color in colors:
@@ -52,5 +52,5 @@ knowledge.add(And(
 ))
 
 for symbol in symbols:
-    if model_check(knowledge, symbol):
+    if knowledge.entails(symbol):
         print(symbol)
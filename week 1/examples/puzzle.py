@@ -5,7 +5,7 @@ houses = ["Gryffindor", "Hufflepuff", "Ravenclaw", "Slytherin"]
 
 symbols = []
 
-knowledge = And()
+knowledge = KnowledgeBase()
 
 for person in people:
     for house in houses:
@@ -51,5 +51,5 @@ knowledge.add(
 )
 
 for symbol in symbols:
-    if model_check(knowledge, symbol):
+    if knowledge.entails(symbol):
         print(symbol)
@@ -0,0 +1,225 @@
+import random
+
+import logic
+from logic import *
+
+symbols = [Symbol(name) for name in "abcdef"]
+
+
+def random_sentence(depth):
+    """
+    Returns a random sentence over symbols, nested up to depth
+    """
+    if depth == 0 or random.random() < 0.3:
+        symbol = random.choice(symbols)
+        return symbol if random.random() < 0.6 else Not(symbol)
+    kind = random.randrange(5)
+    if kind == 0:
+        return Not(random_sentence(depth - 1))
+    if kind == 1:
+        return And(*[random_sentence(depth - 1)
+                     for _ in range(random.randint(1, 3))])
+    if kind == 2:
+        return Or(*[random_sentence(depth - 1)
+                    for _ in range(random.randint(1, 3))])
+    if kind == 3:
+        return Implication(random_sentence(depth - 1),
+                           random_sentence(depth - 1))
+    return Biconditional(random_sentence(depth - 1),
+                         random_sentence(depth - 1))
+
+
+def random_cases(count, seed=0):
+    """
+    Returns count random (knowledge, query) pairs
+    """
+    random.seed(seed)
+    return [(And(*[random_sentence(3) for _ in range(random.randint(1, 4))]),
+             random_sentence(2))
+            for _ in range(count)]
+
+
+def test_model_check_matches_enumeration():
+    entailed = 0
+    for knowledge, query in random_cases(1000):
+        answer = model_check(knowledge, query)
+        assert answer == model_check_enumerate(knowledge, query)
+        entailed += answer
+    # Both answers show up
+    assert 0 < entailed < 1000
+
+
+def test_interning():
+    a, b, c = symbols[:3]
+    assert Symbol("a") is a
+    assert Implication(a, Not(b)) is Implication(Symbol("a"), Not(b))
+    assert Or(a, b) is not Or(b, a)
+    assert len({Not(a), Not(a), Not(b)}) == 2
+
+    # Nested And and Or are flattened
+    assert Or(Or(a, b), c) is Or(a, b, c)
+    knowledge = And(And(a, b), c)
+    assert knowledge.conjuncts == [a, b, c]
+    knowledge.add(And(Not(a), Or(b, c)))
+    assert knowledge.conjuncts == [a, b, c, Not(a), Or(b, c)]
+    assert knowledge.symbols() == {"a", "b", "c"}
+    assert knowledge == And(a, b, c, Not(a), Or(b, c))
+    assert hash(knowledge) == hash(And(a, b, c, Not(a), Or(b, c)))
+
+    # An And inside another sentence can not grow
+    inner = And(a, b)
+    assert Not(inner) == Not(And(a, b))
+    assert hash(Not(inner)) == hash(Not(And(a, b)))
+    try:
+        inner.add(c)
+    except Exception:
+        pass
+    else:
+        raise AssertionError("added to an And inside another sentence")
+
+
+def test_compile():
+    names = [symbol.name for symbol in symbols]
+    random.seed(2)
+    for _ in range(300):
+        sentence = random_sentence(4)
+        compiled = sentence.compile(names)
+        for packed in range(1 << len(names)):
+            model = {name: bool(packed >> i & 1)
+                     for i, name in enumerate(names)}
+            assert compiled(packed) is sentence.evaluate(model)
+
+    # Deeper than one Python expression can nest
+    deep = symbols[0]
+    for _ in range(300):
+        deep = Not(deep)
+    assert deep.compile(["a"])(1) is True
+    assert And().compile([])(0) is True
+    assert Or().compile([])(0) is False
+    try:
+        symbols[1].compile(["a"])
+    except EvaluationException:
+        pass
+    else:
+        raise AssertionError("compiled a symbol missing from the model")
+
+
+def test_model_check_numpy():
+    for knowledge, query in random_cases(300, seed=3):
+        assert (model_check(knowledge, query, method="numpy")
+                == model_check_enumerate(knowledge, query))
+
+    # Fewer symbols than bits in a word, and models split across chunks
+    a, b = symbols[:2]
+    assert model_check(And(a, b), a, method="numpy")
+    assert not model_check(a, b, method="numpy")
+    assert model_check(And(a, Not(a)), b, method="numpy")
+    chunk_bits = logic.CHUNK_BITS
+    logic.CHUNK_BITS = 7
+    try:
+        letters = [Symbol(letter) for letter in "abcdefghijkl"]
+        knowledge = And(*[Implication(letters[i], letters[i + 1])
+                          for i in range(len(letters) - 1)])
+        assert model_check(And(knowledge, letters[0]), letters[-1],
+                           method="numpy")
+        assert not model_check(knowledge, letters[-1], method="numpy")
+        assert not model_check(And(knowledge, letters[0]), Not(letters[-1]),
+                               method="numpy")
+    finally:
+        logic.CHUNK_BITS = chunk_bits
+
+
+def test_knowledge_base():
+    literals = symbols + [Not(symbol) for symbol in symbols]
+    for knowledge, query in random_cases(200, seed=4):
+        # Answers while sentences are added one at a time
+        base = KnowledgeBase()
+        for i, sentence in enumerate(knowledge.conjuncts):
+            base.add(sentence)
+            sofar = And(*knowledge.conjuncts[:i + 1])
+            assert base.satisfiable() == (satisfiable(sofar) is not None)
+            for sentence in literals + [query]:
+                assert base.entails(sentence) == model_check(sofar, sentence)
+
+    # Symbols a query brings in are unconstrained
+    a, b, c = symbols[:3]
+    base = KnowledgeBase(Implication(a, b), a)
+    assert base.entails(b)
+    assert not base.entails(c)
+    assert base.entails(Or(c, Not(c)))
+    base.add(c)
+    assert base.entails(c)
+    assert base.entails(And(b, c))
+
+
+def test_satisfiable():
+    contradiction = And(symbols[0], Not(symbols[0]))
+    for knowledge, _ in random_cases(300, seed=1):
+        model = satisfiable(knowledge)
+        if model is None:
+            assert model_check_enumerate(knowledge, contradiction)
+        else:
+            assert knowledge.evaluate(model)
+    assert satisfiable(contradiction) is None
+    assert satisfiable(Or()) is None
+    assert satisfiable(And()) == {}
+
+
+def test_pigeonhole():
+    # 6 pigeons do not fit in 5 holes
+    holes = 5
+    pigeons = [[Symbol(f"pigeon{i}hole{j}") for j in range(holes)]
+               for i in range(holes + 1)]
+    knowledge = And(*[Or(*pigeon) for pigeon in pigeons])
+    for j in range(holes):
+        for a in range(holes + 1):
+            for b in range(a + 1, holes + 1):
+                knowledge.add(Or(Not(pigeons[a][j]), Not(pigeons[b][j])))
+    assert satisfiable(knowledge) is None
+    assert satisfiable(And(*knowledge.conjuncts[1:])) is not None
+
+
+def test_examples():
+    rain = Symbol("rain")
+    hagrid = Symbol("hagrid")
+    dumbledore = Symbol("dumbledore")
+    knowledge = And(
+        Implication(Not(rain), hagrid),
+        Or(hagrid, dumbledore),
+        Not(And(hagrid, dumbledore)),
+        dumbledore
+    )
+    assert model_check(knowledge, rain)
+    assert not model_check(knowledge, hagrid)
+
+    mustard, plum, scarlet = map(Symbol, ["ColMustard", "ProfPlum",
+                                          "MsScarlet"])
+    ballroom, kitchen, library = map(Symbol, ["ballroom", "kitchen",
+                                              "library"])
+    knife, revolver, wrench = map(Symbol, ["knife", "revolver", "wrench"])
+    knowledge = And(
+        Or(mustard, plum, scarlet),
+        Or(ballroom, kitchen, library),
+        Or(knife, revolver, wrench),
+        And(Not(mustard), Not(kitchen), Not(revolver)),
+        Or(Not(scarlet), Not(library), Not(wrench)),
+        Not(plum),
+        Not(ballroom)
+    )
+    for symbol in [scarlet, library, knife]:
+        assert model_check(knowledge, symbol)
+    for symbol in [mustard, plum, ballroom, kitchen, revolver, wrench]:
+        assert model_check(knowledge, Not(symbol))
+
+    # Without the last card the room is not known
+    knowledge = And(*knowledge.conjuncts[:-1])
+    assert not model_check(knowledge, library)
+    assert not model_check(knowledge, Not(library))
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items())
+             if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"{test.__name__}: OK")
@@ -1,7 +1,40 @@
 import itertools
 
+# Depth of nested sentences compiled into one Python expression, deeper
+# ones are compiled into functions of their own
+COMPILE_DEPTH = 50
+
+# Compiled sentences kept by Sentence.compile, at most this many
+COMPILE_CACHE_SIZE = 1024
+
+# model_check_numpy evaluates 2 ** CHUNK_BITS models at a time
+CHUNK_BITS = 20
+
+# Most symbols model_check_numpy enumerates the models of
+NUMPY_SYMBOLS = 30
+
+# Most symbols a KnowledgeBase keeps the table of models of
+TABLE_SYMBOLS = 26
+
+# Interned sentences kept by Sentence.intern, at most this many
+INTERN_TABLE_SIZE = 1 << 16
+
 
 class Sentence():
+    """
+    Sentences other than And are immutable and interned: making one
+    of the same operands as a recent sentence returns that sentence,
+    so repeated subsentences are stored once. Each keeps its hash and
+    its set of symbols, computed once when it is made. Equality still
+    compares structure, so sentences made before the table was last
+    cleared equal the ones made after.
+    """
+
+    # Functions compiled from sentences, keyed by (repr, symbols)
+    compiled = {}
+
+    # Interned sentences, keyed by class and operands
+    interned = {}
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -12,8 +45,88 @@ class Sentence():
         return ""
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozenset of all symbols in the logical sentence."""
+        return frozenset()
+
+    def compile(self, symbols=None):
+        """
+        Returns a function evaluating the sentence in a model packed
+        into an int, where bit i is the value of symbols[i] (the
+        sorted symbol names by default). The sentence is turned into
+        Python code once, so each evaluation runs no tree walk or
+        dict lookups, and sentences compiled before are reused.
+        """
+        if symbols is None:
+            symbols = sorted(self.symbols())
+        key = (repr(self), tuple(symbols))
+        function = Sentence.compiled.get(key)
+        if function is None:
+            if len(Sentence.compiled) >= COMPILE_CACHE_SIZE:
+                Sentence.compiled.clear()
+            indices = {name: i for i, name in enumerate(symbols)}
+            function = Sentence.lower(self, indices)
+            Sentence.compiled[key] = function
+        return function
+
+    def source(self, indices, namespace, depth):
+        """
+        Returns a Python expression of the sentence's truth in the
+        packed model m. Functions it calls are added to namespace.
+        """
+        raise Exception("nothing to compile")
+
+    def evaluate_bits(self, columns, ones):
+        """
+        Evaluates the sentence in many models at once, bit b of every
+        word being one model. columns maps each symbol name to its
+        word array and ones is an array of words with every bit set.
+        Works on anything with bitwise operators, like NumPy arrays.
+        """
+        raise Exception("nothing to evaluate")
+
+    @classmethod
+    def lower(cls, sentence, indices):
+        """Compiles sentence with symbol name to bit index map indices."""
+        namespace = {}
+        source = sentence.source(indices, namespace, 0)
+        return eval(f"lambda m: bool({source})", namespace)
+
+    @classmethod
+    def operand_source(cls, sentence, indices, namespace, depth):
+        """
+        Returns the expression of an operand at depth, or a call to
+        a function of its own past COMPILE_DEPTH, as Python limits
+        how deeply expressions nest.
+        """
+        if depth < COMPILE_DEPTH:
+            return sentence.source(indices, namespace, depth)
+        name = f"f{len(namespace)}"
+        namespace[name] = Sentence.lower(sentence, indices)
+        return f"{name}(m)"
+
+    @classmethod
+    def intern(cls, key, *operands):
+        """
+        Makes and interns the sentence of this class with these operands
+        under key, for the caller to set its fields. Keys are the class
+        and the operands, sentences among them by identity, as equal
+        interned sentences are the same object and the table keeps them
+        alive. An And among the operands can not grow afterwards, as
+        that would change the sentence.
+        """
+        if len(Sentence.interned) >= INTERN_TABLE_SIZE:
+            Sentence.interned.clear()
+        sentence = object.__new__(cls)
+        sentence.hash_value = hash((cls.__name__, *operands))
+        sentence.symbol_set = frozenset().union(*[
+            operand.symbols() for operand in operands
+            if isinstance(operand, Sentence)
+        ])
+        for operand in operands:
+            if isinstance(operand, And):
+                operand.frozen = True
+        Sentence.interned[key] = sentence
+        return sentence
 
     @classmethod
     def validate(cls, sentence):
@@ -44,14 +157,21 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        key = (cls, name)
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = cls.intern(key, name)
+            sentence.name = name
+            sentence.symbol_set = frozenset([name])
+        return sentence
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name)
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self.hash_value
 
     def __repr__(self):
         return self.name
@@ -66,19 +186,37 @@ class Symbol(Sentence):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        return self.symbol_set
+
+    def source(self, indices, namespace, depth):
+        try:
+            return f"(m >> {indices[self.name]} & 1)"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def evaluate_bits(self, columns, ones):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        key = (cls, id(operand))
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = cls.intern(key, operand)
+            sentence.operand = operand
+        return sentence
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand)
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self.hash_value
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -90,22 +228,47 @@ class Not(Sentence):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
-        return self.operand.symbols()
+        return self.symbol_set
+
+    def source(self, indices, namespace, depth):
+        operand = Sentence.operand_source(
+            self.operand, indices, namespace, depth + 1)
+        return f"(not {operand})"
+
+    def evaluate_bits(self, columns, ones):
+        return ~self.operand.evaluate_bits(columns, ones)
 
 
 class And(Sentence):
+    """
+    The one sentence that can grow, so it is not interned. Conjuncts
+    that are themselves And are flattened into this one, copying their
+    conjuncts. Once the And is an operand of another sentence, add()
+    raises, since it would change that sentence too.
+    """
+
     def __init__(self, *conjuncts):
+        self.conjuncts = []
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+            if isinstance(conjunct, And):
+                self.conjuncts.extend(conjunct.conjuncts)
+            else:
+                self.conjuncts.append(conjunct)
+        self.symbol_set = frozenset().union(*[
+            conjunct.symbols() for conjunct in self.conjuncts
+        ])
+        self.hash_value = None
+        self.frozen = False
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and self.conjuncts == other.conjuncts)
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        if self.hash_value is None:
+            self.hash_value = hash(("And", *self.conjuncts))
+        return self.hash_value
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -115,7 +278,15 @@ class And(Sentence):
 
     def add(self, conjunct):
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        if self.frozen:
+            raise Exception("can not add to a sentence inside another one")
+        if isinstance(conjunct, And):
+            self.conjuncts.extend(conjunct.conjuncts)
+        else:
+            self.conjuncts.append(conjunct)
+        if not conjunct.symbols() <= self.symbol_set:
+            self.symbol_set |= conjunct.symbols()
+        self.hash_value = None
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -127,22 +298,46 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return self.symbol_set
+
+    def source(self, indices, namespace, depth):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            Sentence.operand_source(conjunct, indices, namespace, depth + 1)
+            for conjunct in self.conjuncts
+        ) + ")"
+
+    def evaluate_bits(self, columns, ones):
+        result = ones
+        for conjunct in self.conjuncts:
+            result = result & conjunct.evaluate_bits(columns, ones)
+        return result
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    def __new__(cls, *disjuncts):
+        # Disjuncts that are themselves Or are flattened into this one
+        flat = []
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+            if isinstance(disjunct, Or):
+                flat.extend(disjunct.disjuncts)
+            else:
+                flat.append(disjunct)
+        key = (cls, *map(id, flat))
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = cls.intern(key, *flat)
+            sentence.disjuncts = flat
+        return sentence
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self.disjuncts == other.disjuncts)
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return self.hash_value
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -158,23 +353,43 @@ class Or(Sentence):
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return self.symbol_set
+
+    def source(self, indices, namespace, depth):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            Sentence.operand_source(disjunct, indices, namespace, depth + 1)
+            for disjunct in self.disjuncts
+        ) + ")"
+
+    def evaluate_bits(self, columns, ones):
+        result = ~ones
+        for disjunct in self.disjuncts:
+            result = result | disjunct.evaluate_bits(columns, ones)
+        return result
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        key = (cls, id(antecedent), id(consequent))
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = cls.intern(key, antecedent, consequent)
+            sentence.antecedent = antecedent
+            sentence.consequent = consequent
+        return sentence
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication)
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent)
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self.hash_value
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -189,23 +404,40 @@ class Implication(Sentence):
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return self.symbol_set
+
+    def source(self, indices, namespace, depth):
+        antecedent = Sentence.operand_source(
+            self.antecedent, indices, namespace, depth + 1)
+        consequent = Sentence.operand_source(
+            self.consequent, indices, namespace, depth + 1)
+        return f"(not {antecedent} or {consequent})"
+
+    def evaluate_bits(self, columns, ones):
+        return (~self.antecedent.evaluate_bits(columns, ones)
+                | self.consequent.evaluate_bits(columns, ones))
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        key = (cls, id(left), id(right))
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = cls.intern(key, left, right)
+            sentence.left = left
+            sentence.right = right
+        return sentence
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional)
+            and self.left == other.left
+            and self.right == other.right)
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self.hash_value
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -222,42 +454,524 @@ class Biconditional(Sentence):
         return f"{left} <=> {right}"
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
+        return self.symbol_set
+
+    def source(self, indices, namespace, depth):
+        left = Sentence.operand_source(
+            self.left, indices, namespace, depth + 1)
+        right = Sentence.operand_source(
+            self.right, indices, namespace, depth + 1)
+        return f"((not {left}) == (not {right}))"
+
+    def evaluate_bits(self, columns, ones):
+        return ~(self.left.evaluate_bits(columns, ones)
+                 ^ self.right.evaluate_bits(columns, ones))
+
+
+def model_check(knowledge, query, method="sat"):
+    """
+    Checks if knowledge base entails query, by checking that
+    knowledge and not query can not both be true. method is "sat"
+    to search for such a model with the SAT solver, or "numpy" or
+    "enumerate" to try every model.
+    """
+    if method == "numpy":
+        return model_check_numpy(knowledge, query)
+    if method == "enumerate":
+        return model_check_enumerate(knowledge, query)
+    if method != "sat":
+        raise ValueError(f"unknown method: {method}")
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return Solver(cnf.clauses, cnf.count).solve() is None
+
+
+def model_check_enumerate(knowledge, query):
+    """
+    Checks if knowledge base entails query, trying every model.
+    Models are packed into ints and both sentences are compiled,
+    so each model costs two calls of a generated function.
+    """
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
+    # Get all symbols in both knowledge and query
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    knowledge = knowledge.compile(symbols)
+    query = query.compile(symbols)
+
+    # In every model where knowledge base is true, query must also be true
+    return all(query(model) for model in range(1 << len(symbols))
+               if knowledge(model))
+
+
+def model_check_numpy(knowledge, query):
+    """
+    Checks if knowledge base entails query, trying every model with
+    NumPy: each symbol is a column of bits, one bit per model and
+    64 models per word, so connectives are bitwise operations on
+    arrays. Models are evaluated 2 ** CHUNK_BITS at a time to keep
+    memory bounded.
+    """
+    import numpy as np
+
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    if len(symbols) > NUMPY_SYMBOLS:
+        raise ValueError(f"too many symbols to enumerate: {len(symbols)}")
+
+    # Symbol i is true in model m when bit i of m is set. The low 6
+    # bits of m pick the bit of a word, the next ones the word in the
+    # chunk and the rest the chunk.
+    chunk_bits = min(len(symbols), CHUNK_BITS)
+    words = np.arange(1 << max(chunk_bits - 6, 0), dtype=np.uint64)
+    ones = np.full(len(words), ~np.uint64(0))
+    zeros = ~ones
+    if chunk_bits < 6:
+        valid = ones & np.uint64((1 << (1 << chunk_bits)) - 1)
+    else:
+        valid = ones
+    columns = {}
+    for i, name in enumerate(symbols[:chunk_bits]):
+        if i < 6:
+            pattern = sum(1 << bit for bit in range(64) if bit >> i & 1)
+            columns[name] = ones & np.uint64(pattern)
+        else:
+            columns[name] = np.where(words >> np.uint64(i - 6) & np.uint64(1),
+                                     ones, zeros)
+
+    for chunk in range(1 << (len(symbols) - chunk_bits)):
+        for i, name in enumerate(symbols[chunk_bits:]):
+            columns[name] = ones if chunk >> i & 1 else zeros
+
+        # Models where knowledge base is true and query is false
+        counterexamples = (knowledge.evaluate_bits(columns, ones)
+                           & ~query.evaluate_bits(columns, ones) & valid)
+        if counterexamples.any():
+            return False
+    return True
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that answers many entailment queries from one table
+    of the models it is true in: an int with bit m set when every
+    sentence is true in model m, where symbol i is true when bit i of
+    m is set. Adding a sentence clears the models it is false in, so
+    entailed queries stay entailed and only other answers are dropped.
+    """
+
+    def __init__(self, *sentences):
+        self.knowledge = And()
+        self.symbols = []
+        self.indices = {}
+        self.columns = {}
+
+        # With no symbols there is one model, the empty one
+        self.models = 1
+
+        # Answers to queries keyed by repr, entailed ones hold forever
+        self.entailed = set()
+        self.not_entailed = set()
+
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds sentence to the knowledge base, refining its models."""
+        self.knowledge.add(sentence)
+        table = self.truth_table(sentence)
+        self.models &= table
+        self.not_entailed.clear()
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        key = repr(query)
+        if key in self.entailed:
             return True
+        if key in self.not_entailed:
+            return False
+        # New symbols in query extend the models, so build its table first
+        table = self.truth_table(query)
+        if self.models & ~table:
+            self.not_entailed.add(key)
+            return False
+        self.entailed.add(key)
+        return True
+
+    def satisfiable(self):
+        """Checks if some model makes every sentence true."""
+        return self.models != 0
+
+    def extend(self, names):
+        """
+        Adds symbols to the table of models. Each new symbol doubles
+        it: every model so far stays one with the symbol false and
+        one with the symbol true.
+        """
+        for name in sorted(set(names) - self.indices.keys()):
+            if len(self.symbols) == TABLE_SYMBOLS:
+                raise ValueError(f"more than {TABLE_SYMBOLS} symbols")
+            self.models |= self.models << (1 << len(self.symbols))
+            self.indices[name] = len(self.symbols)
+            self.symbols.append(name)
+            self.columns.clear()
+
+    def truth_table(self, sentence):
+        """
+        Returns an int with bit m set when sentence is true in model m.
+        """
+        self.extend(sentence.symbols())
+        ones = (1 << (1 << len(self.symbols))) - 1
+        for name in sentence.symbols():
+            if name not in self.columns:
+                # Bits of models where the symbol is true repeat every
+                # 2 ** (i + 1) models, the second half of each period set
+                half = 1 << self.indices[name]
+                period = ((1 << half) - 1) << half
+                self.columns[name] = ones // ((1 << 2 * half) - 1) * period
+        return sentence.evaluate_bits(self.columns, ones) & ones
+
+
+def satisfiable(sentence):
+    """
+    Returns a model (a dict from symbol name to bool) in which
+    sentence is true, or None if there is none.
+    """
+    cnf = CNF()
+    cnf.add(sentence)
+    assignment = Solver(cnf.clauses, cnf.count).solve()
+    if assignment is None:
+        return None
+    return {name: assignment[variable]
+            for name, variable in cnf.variables.items()}
+
+
+class CNF():
+    """
+    Conjunctive normal form of sentences, as clauses of integer
+    literals: variable v stands for v and -v for its negation.
+
+    Sentences are converted with the Tseitin transformation, so the
+    clauses grow linearly with the sentences: every And, Or and
+    Biconditional below the top gets a new variable, with clauses
+    making it equal to its operands. Equal subsentences share one.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.count = 0
+
+        # Variable of each symbol name, and of each defined subsentence
+        self.variables = {}
+        self.definitions = {}
+
+    def variable(self, name):
+        """Returns the variable of a symbol name, adding it if new."""
+        if name not in self.variables:
+            self.count += 1
+            self.variables[name] = self.count
+        return self.variables[name]
+
+    def add(self, sentence):
+        """Adds clauses making sentence true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct)
+                                 for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
+        elif isinstance(sentence, Not) and isinstance(sentence.operand, Or):
+            for disjunct in sentence.operand.disjuncts:
+                self.add(Not(disjunct))
         else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal that is true exactly when sentence is."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if isinstance(sentence, Implication):
+            return self.literal(Or(Not(sentence.antecedent),
+                                   sentence.consequent))
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        self.count += 1
+        defined = self.count
+        if isinstance(sentence, And):
+            operands = [self.literal(conjunct)
+                        for conjunct in sentence.conjuncts]
+            # defined => every operand, all operands => defined
+            for operand in operands:
+                self.clauses.append([-defined, operand])
+            self.clauses.append([defined] + [-operand for operand in operands])
+        elif isinstance(sentence, Or):
+            operands = [self.literal(disjunct)
+                        for disjunct in sentence.disjuncts]
+            # defined => some operand, any operand => defined
+            self.clauses.append([-defined] + operands)
+            for operand in operands:
+                self.clauses.append([defined, -operand])
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            self.clauses.extend([
+                [-defined, -left, right], [-defined, left, -right],
+                [defined, left, right], [defined, -left, -right]
+            ])
+        else:
+            raise TypeError("must be a logical sentence")
+        self.definitions[sentence] = defined
+        return defined
+
+
+class Solver():
+    """
+    DPLL satisfiability solver with clause learning (CDCL).
+
+    Pure literals are set before the search. The search then picks a
+    variable, propagates unit clauses through two watched literals per
+    clause, and on a conflict learns a clause that rules out its cause
+    and jumps back to the decision that made it possible.
+    """
+
+    def __init__(self, clauses, count):
+        self.count = count
+        self.clauses = []
+
+        # Per variable: value (None while unassigned), decision level
+        # and the clause that implied it (None for decisions)
+        self.values = [None] * (count + 1)
+        self.levels = [0] * (count + 1)
+        self.reasons = [None] * (count + 1)
+
+        # Assigned literals in order, and where each level starts
+        self.trail = []
+        self.level_starts = []
+        self.propagated = 0
+
+        # Clauses watching each literal, indexed by literal + count
+        self.watches = [[] for _ in range(2 * count + 1)]
+
+        # Decision heuristic: variables in conflicts are tried first,
+        # with the value they last had
+        self.activity = [0.0] * (count + 1)
+        self.increment = 1.0
+        self.phases = [False] * (count + 1)
+
+        self.conflict = False
+        for clause in clauses:
+            self.add_clause(clause)
+        if not self.conflict:
+            self.eliminate_pure_literals()
+
+    def value(self, literal):
+        """Returns the truth of literal, None while it is unassigned."""
+        value = self.values[abs(literal)]
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = len(self.level_starts)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def add_clause(self, clause):
+        """Adds an input clause, dropping repeats and tautologies."""
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        if not clause:
+            self.conflict = True
+        elif len(clause) == 1:
+            value = self.value(clause[0])
+            if value is False:
+                self.conflict = True
+            elif value is None:
+                self.assign(clause[0], None)
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        """Stores clause, watching its first two literals."""
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0] + self.count].append(index)
+        self.watches[clause[1] + self.count].append(index)
+        return index
+
+    def eliminate_pure_literals(self):
+        """
+        Sets every variable that appears with only one sign in the
+        clauses not yet satisfied, until there are none left.
+        """
+        while True:
+            signs = {}
+            for clause in self.clauses:
+                if any(self.value(literal) for literal in clause):
+                    continue
+                for literal in clause:
+                    if self.values[abs(literal)] is None:
+                        signs.setdefault(abs(literal), set()).add(literal > 0)
+            pure = [variable if True in found else -variable
+                    for variable, found in signs.items() if len(found) == 1]
+            if not pure:
+                return
+            for literal in pure:
+                self.assign(literal, None)
+
+    def propagate(self):
+        """
+        Assigns the literals unit clauses force, returning the index
+        of a clause with every literal false, or None.
+        """
+        count = self.count
+        while self.propagated < len(self.trail):
+            false_literal = -self.trail[self.propagated]
+            self.propagated += 1
+            watching = self.watches[false_literal + count]
+            kept = []
+            conflict = None
+            for position, index in enumerate(watching):
+                clause = self.clauses[index]
+
+                # Keep the false literal second
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+
+                # Watch another literal that is not false, if any
+                for other in range(2, len(clause)):
+                    if self.value(clause[other]) is not False:
+                        clause[1], clause[other] = clause[other], clause[1]
+                        self.watches[clause[1] + count].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.value(clause[0]) is False:
+                        conflict = index
+                        kept.extend(watching[position + 1:])
+                        break
+                    self.assign(clause[0], index)
+            self.watches[false_literal + count] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, with the literal
+        it asserts first, and the level to jump back to. Resolves
+        the conflict with the reasons of the current level's literals
+        until one of them is left, the first unique implication point.
+        """
+        level = len(self.level_starts)
+        learned = [None]
+        seen = set()
+        pending = 0
+        position = len(self.trail)
+        clause = self.clauses[conflict]
+        literal = None
+        while True:
+            for other in clause:
+                if other == literal:
+                    continue
+                variable = abs(other)
+                if variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Next literal of this level on the trail that is involved
+            position -= 1
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal of the highest other level second
+        highest = max(range(1, len(learned)),
+                      key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[highest] = learned[highest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+
+    def backjump(self, level):
+        """Unassigns every literal above level."""
+        start = self.level_starts[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = literal > 0
+            self.values[variable] = None
+            self.reasons[variable] = None
+        del self.trail[start:]
+        del self.level_starts[level:]
+        self.propagated = len(self.trail)
+
+    def decide(self):
+        """
+        Returns the literal to try next: the unassigned variable most
+        involved in recent conflicts, with its last value, or None if
+        every variable has a value.
+        """
+        best = None
+        for variable in range(1, self.count + 1):
+            if self.values[variable] is None and (
+                    best is None
+                    or self.activity[variable] > self.activity[best]):
+                best = variable
+        if best is None:
+            return None
+        return best if self.phases[best] else -best
+
+    def solve(self):
+        """
+        Returns a satisfying assignment as a list of bools indexed by
+        variable (index 0 unused), or None if there is none.
+        """
+        if self.conflict:
+            return None
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.level_starts:
+                    return None
+                learned, level = self.analyze(conflict)
+                self.backjump(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.watch(learned))
+                self.increment *= 1.05
+                continue
+
+            literal = self.decide()
+            if literal is None:
+                return [bool(value) for value in self.values]
+            self.level_starts.append(len(self.trail))
+            self.assign(literal, None)
@@ -109,8 +109,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
+            knowledge = KnowledgeBase(*knowledge.conjuncts)
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                if knowledge.entails(symbol):
                     print(f"    {symbol}")
 
 
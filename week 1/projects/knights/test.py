@@ -0,0 +1,36 @@
+from logic import KnowledgeBase, model_check, model_check_enumerate
+import puzzle
+
+symbols = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight, puzzle.BKnave,
+           puzzle.CKnight, puzzle.CKnave]
+
+# Symbols each puzzle's knowledge entails
+answers = {
+    "knowledge0": {"A is a Knave"},
+    "knowledge1": {"A is a Knave", "B is a Knight"},
+    "knowledge2": {"A is a Knave", "B is a Knight"},
+    "knowledge3": {"A is a Knight", "B is a Knave", "C is a Knight"}
+}
+
+
+def test_puzzles():
+    for name, expected in answers.items():
+        knowledge = getattr(puzzle, name)
+        entailed = {symbol.name for symbol in symbols
+                    if model_check(knowledge, symbol)}
+        assert entailed == expected
+        base = KnowledgeBase(*knowledge.conjuncts)
+        assert {symbol.name for symbol in symbols
+                if base.entails(symbol)} == expected
+        for symbol in symbols:
+            assert (model_check(knowledge, symbol)
+                    == model_check_enumerate(knowledge, symbol)
+                    == model_check(knowledge, symbol, method="numpy"))
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items())
+             if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"{test.__name__}: OK")